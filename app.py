@@ -1,8 +1,15 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
-import re
-from datetime import datetime
-from db import Database
+from tkinter import ttk, messagebox, filedialog
+import os
+import threading
+from db import Database, ROLES
+from backup import create_snapshot, prune_snapshots
+from maintenance import MaintenanceScheduler, STOP_TIMEOUT
+from sessions import SessionStore
+from reports import build_report, write_csv, write_html
+
+# How often the open session is checked for idle expiry (milliseconds)
+SESSION_CHECK_INTERVAL = 30 * 1000
 
 class StudentManagementApp:
     def __init__(self, root):
@@ -14,9 +21,24 @@ class StudentManagementApp:
         # Initialize database
         self.db = Database()
         
+        # Background maintenance (VACUUM, ANALYZE, backups) runs only while the UI is idle
+        self.scheduler = MaintenanceScheduler(self.db.db_name)
+        self.scheduler.add_default_jobs()
+        self.root.bind_all("<Any-KeyPress>", self.on_activity, add="+")
+        self.root.bind_all("<Any-ButtonPress>", self.on_activity, add="+")
+        self.scheduler.start()
+        
         # Session data
         self.current_user = None
         self.user_type = None  # 'student' or 'lecturer'
+        self.user_role = None  # 'admin' or 'lecturer' for lecturer accounts
+        self.pending_password_change = None  # (lecturer_id, current password) until changed
+        
+        # Sessions survive restarts via a token file and expire when idle
+        self.sessions = SessionStore(self.db)
+        self.session_token = None
+        self.session_file = os.path.join(os.path.dirname(os.path.abspath(self.db.db_name)), ".session")
+        self.user_active = False
         
         # Setup styles
         self.style = ttk.Style()
@@ -28,8 +50,91 @@ class StudentManagementApp:
         self.frames = {}
         self.create_frames()
         
-        # Show welcome screen
-        self.show_frame("welcome")
+        # Resume a saved session, otherwise show welcome screen
+        if not self.restore_session():
+            self.show_frame("welcome")
+        self.root.after(SESSION_CHECK_INTERVAL, self.check_session)
+    
+    def on_activity(self, event):
+        """Record user activity for idle detection"""
+        self.scheduler.touch()
+        self.user_active = True
+    
+    def start_session(self, user_type, user_id):
+        """Set the logged in user and save a session token for later restarts"""
+        self.current_user = user_id
+        self.user_type = user_type
+        self.user_role = self.db.get_lecturer(user_id)['role'] if user_type == "lecturer" else None
+        self.session_token = self.sessions.create(user_type, user_id)
+        try:
+            with open(self.session_file, "w") as f:
+                f.write(self.session_token)
+            os.chmod(self.session_file, 0o600)
+        except OSError:
+            pass  # Without the file the session just won't survive a restart
+    
+    def end_session(self):
+        """Revoke the current session and clear session data"""
+        if self.session_token:
+            self.sessions.revoke(self.session_token)
+        self.session_token = None
+        self.current_user = None
+        self.user_type = None
+        self.user_role = None
+        try:
+            os.remove(self.session_file)
+        except OSError:
+            pass
+    
+    def refresh_role(self):
+        """Re-read the lecturer's role, which another admin may have changed since login"""
+        lecturer = self.db.get_lecturer(self.current_user) if self.user_type == "lecturer" else None
+        self.user_role = lecturer['role'] if lecturer else None
+        return self.user_role
+    
+    def restore_session(self):
+        """Resume the session saved by a previous run, if it is still valid"""
+        try:
+            with open(self.session_file) as f:
+                token = f.read().strip()
+        except OSError:
+            return False
+        
+        # A cheap token check replaces the password hash on restart
+        session = self.sessions.validate(token)
+        if session and session['user_type'] == "lecturer":
+            lecturer = self.db.get_lecturer(session['user_id'])
+            if lecturer and not lecturer['must_change_password']:
+                self.user_role = lecturer['role']
+            else:
+                session = None  # Account was deleted or must log in to change its password
+        
+        self.session_token = token
+        if not session:
+            self.end_session()
+            return False
+        
+        self.current_user = session['user_id']
+        self.user_type = session['user_type']
+        self.show_frame(f"{self.user_type}_dashboard")
+        return True
+    
+    def check_session(self):
+        """Extend the session after activity, or log out once it has expired"""
+        if self.session_token:
+            session = self.sessions.validate(self.session_token, extend=self.user_active)
+            if not session:
+                self.end_session()
+                self.show_frame("welcome")
+                messagebox.showinfo("Session Expired", "You have been logged out due to inactivity.")
+            elif self.user_type == "lecturer" and self.refresh_role() is None:
+                # The account was deleted by an admin (possibly on another machine)
+                self.end_session()
+                self.show_frame("welcome")
+                messagebox.showinfo("Logged Out", "Your account has been removed.")
+
+        self.user_active = False
+        self.root.after(SESSION_CHECK_INTERVAL, self.check_session)
     
     def create_frames(self):
         """Create all frames/screens for the application"""
@@ -45,7 +150,7 @@ class StudentManagementApp:
         ttk.Button(welcome_frame, text="Student Registration", 
                   command=lambda: self.show_frame("student_registration")).pack(pady=10, fill=tk.X)
         ttk.Button(welcome_frame, text="Lecturer Login", 
-                  command=lambda: self.show_frame("lecturer_login")).pack(pady=10, fill=tk.X)
+                  command=self.open_lecturer_login).pack(pady=10, fill=tk.X)
         ttk.Button(welcome_frame, text="Exit", 
                   command=self.root.quit).pack(pady=(30, 10), fill=tk.X)
         
@@ -58,6 +163,13 @@ class StudentManagementApp:
         # Lecturer Login
         self.create_lecturer_login_frame()
         
+        # First admin account setup
+        self.create_admin_setup_frame()
+        
+        # Forced password change (e.g. the old default admin account)
+        self.create_change_password_frame()
+
+        
         # Student Dashboard
         self.create_student_dashboard_frame()
         
@@ -69,6 +181,12 @@ class StudentManagementApp:
         
         # Update Student Data (for students)
         self.create_update_student_frame()
+        
+        # Manage Lecturer Accounts (for admins)
+        self.create_manage_lecturers_frame()
+        
+        # Enrollment Reports (for lecturers)
+        self.create_reports_frame()
     
     def show_frame(self, frame_name):
         """Show the specified frame and hide others"""
@@ -81,6 +199,12 @@ class StudentManagementApp:
         if frame_name == "lecturer_dashboard":
             self.load_all_students()
         
+        if frame_name == "manage_lecturers":
+            self.load_all_lecturers()
+        
+        if frame_name == "reports":
+            self.load_reports()
+        
         self.frames[frame_name].pack(fill=tk.BOTH, expand=True)
     
     def create_student_login_frame(self):
@@ -131,18 +255,82 @@ class StudentManagementApp:
         ttk.Entry(login_frame, textvariable=self.lecturer_password_var, show='*', width=30).grid(
             column=1, row=2, sticky=tk.W, pady=5)
         
-        # Default credentials notice
-        ttk.Label(login_frame, text="Default: admin / admin123", 
-                 font=("Arial", 10, "italic")).grid(column=1, row=3, sticky=tk.W, pady=(0, 10))
-        
         # Buttons
         button_frame = ttk.Frame(login_frame)
-        button_frame.grid(column=0, row=4, columnspan=2, pady=10)
+        button_frame.grid(column=0, row=3, columnspan=2, pady=20)
         
         ttk.Button(button_frame, text="Login", command=self.lecturer_login).pack(side=tk.LEFT, padx=5)
         ttk.Button(button_frame, text="Back", command=lambda: self.show_frame("welcome")).pack(
             side=tk.LEFT, padx=5)
     
+    def create_change_password_frame(self):
+        """Create the frame for a lecturer who must change their password before logging in"""
+        password_frame = ttk.Frame(self.root, padding="20")
+        self.frames["change_password"] = password_frame
+        
+        ttk.Label(password_frame, text="Change Password", 
+                 font=("Arial", 16, "bold")).grid(column=0, row=0, columnspan=2, pady=(0, 10))
+        ttk.Label(password_frame, text="Your password must be changed before you can continue.", 
+                 font=("Arial", 10, "italic")).grid(column=0, row=1, columnspan=2, pady=(0, 10))
+        
+        ttk.Label(password_frame, text="New Password:").grid(column=0, row=2, sticky=tk.W, pady=5)
+        self.new_password_var = tk.StringVar()
+        ttk.Entry(password_frame, textvariable=self.new_password_var, show='*', width=30).grid(
+            column=1, row=2, sticky=tk.W, pady=5)
+        
+        ttk.Label(password_frame, text="Confirm Password:").grid(column=0, row=3, sticky=tk.W, pady=5)
+        self.confirm_new_password_var = tk.StringVar()
+        ttk.Entry(password_frame, textvariable=self.confirm_new_password_var, show='*', width=30).grid(
+            column=1, row=3, sticky=tk.W, pady=5)
+        
+        # Buttons
+        button_frame = ttk.Frame(password_frame)
+        button_frame.grid(column=0, row=4, columnspan=2, pady=20)
+        
+        ttk.Button(button_frame, text="Change Password", command=self.change_password).pack(
+            side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Back", command=self.cancel_password_change).pack(
+            side=tk.LEFT, padx=5)
+    
+    def create_admin_setup_frame(self):
+        """Create the frame used to set up the first admin account"""
+        setup_frame = ttk.Frame(self.root, padding="20")
+        self.frames["admin_setup"] = setup_frame
+        
+        ttk.Label(setup_frame, text="Create Admin Account", 
+                 font=("Arial", 16, "bold")).grid(column=0, row=0, columnspan=2, pady=(0, 10))
+        ttk.Label(setup_frame, text="No admin account exists yet. Create one to manage lecturers.", 
+                 font=("Arial", 10, "italic")).grid(column=0, row=1, columnspan=2, pady=(0, 10))
+        
+        fields = [
+            ("Username", "admin_username_var"),
+            ("Password", "admin_password_var", "*"),
+            ("Confirm Password", "admin_confirm_password_var", "*")
+        ]
+        
+        self.admin_setup_vars = {}
+        row = 2
+        
+        for field_info in fields:
+            field_name = field_info[0]
+            var_name = field_info[1]
+            
+            ttk.Label(setup_frame, text=f"{field_name}:").grid(column=0, row=row, sticky=tk.W, pady=5)
+            self.admin_setup_vars[var_name] = tk.StringVar()
+            show = field_info[2] if len(field_info) > 2 else ""
+            ttk.Entry(setup_frame, textvariable=self.admin_setup_vars[var_name], show=show, 
+                      width=30).grid(column=1, row=row, sticky=tk.W, pady=5)
+            row += 1
+        
+        # Buttons
+        button_frame = ttk.Frame(setup_frame)
+        button_frame.grid(column=0, row=row, columnspan=2, pady=20)
+        
+        ttk.Button(button_frame, text="Create Admin", command=self.create_first_admin).pack(
+            side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Back", command=lambda: self.show_frame("welcome")).pack(
+            side=tk.LEFT, padx=5)
+    
     def create_student_registration_frame(self):
         """Create the student registration frame"""
         reg_frame = ttk.Frame(self.root, padding="20")
@@ -162,7 +350,7 @@ class StudentManagementApp:
             ("Home Address", "home_address_var"),
             ("Term Time Address (if different)", "term_address_var"),
             ("Emergency Contact Name", "emergency_name_var"),
-            ("Emergency Contact Number", "emergency_number_var"),
+            ("Emergency Contact Number (e.g. +447700900123)", "emergency_number_var"),
             ("Course", "course_var")
         ]
         
@@ -226,7 +414,8 @@ class StudentManagementApp:
         dashboard_frame = ttk.Frame(self.root, padding="20")
         self.frames["lecturer_dashboard"] = dashboard_frame
         
-        ttk.Label(dashboard_frame, text="Lecturer Dashboard - All Students", 
+        self.lecturer_header_var = tk.StringVar(value="Lecturer Dashboard - All Students")
+        ttk.Label(dashboard_frame, textvariable=self.lecturer_header_var, 
                  font=("Arial", 16, "bold")).pack(pady=(0, 20))
         
         # Search frame
@@ -238,6 +427,11 @@ class StudentManagementApp:
         self.search_var.trace("w", lambda name, index, mode: self.filter_students())
         ttk.Entry(search_frame, textvariable=self.search_var, width=30).pack(side=tk.LEFT, padx=5)
         
+        # Tells the user when name matches were cut off
+        self.search_status_var = tk.StringVar()
+        ttk.Label(search_frame, textvariable=self.search_status_var, 
+                 font=("Arial", 10, "italic")).pack(side=tk.LEFT, padx=5)
+        
         # Student list
         list_frame = ttk.Frame(dashboard_frame)
         list_frame.pack(fill=tk.BOTH, expand=True, pady=10)
@@ -275,8 +469,116 @@ class StudentManagementApp:
         
         ttk.Button(button_frame, text="View Selected Student", 
                   command=self.view_selected_student).pack(side=tk.LEFT, padx=5)
-        ttk.Button(button_frame, text="Logout", 
-                  command=self.logout).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Reports", 
+                  command=lambda: self.show_frame("reports")).pack(side=tk.LEFT, padx=5)
+        
+        # Admin-only buttons (shown by load_all_students)
+        self.admin_button_frame = ttk.Frame(button_frame)
+        ttk.Button(self.admin_button_frame, text="Manage Lecturers", 
+                  command=lambda: self.show_frame("manage_lecturers")).pack(side=tk.LEFT, padx=5)
+        self.backup_button = ttk.Button(self.admin_button_frame, text="Backup Database", 
+                                        command=self.backup_database)
+        self.backup_button.pack(side=tk.LEFT, padx=5)
+        
+        self.lecturer_logout_button = ttk.Button(button_frame, text="Logout", command=self.logout)
+        self.lecturer_logout_button.pack(side=tk.LEFT, padx=5)
+    
+    def create_manage_lecturers_frame(self):
+        """Create the lecturer account management frame (for admins)"""
+        manage_frame = ttk.Frame(self.root, padding="20")
+        self.frames["manage_lecturers"] = manage_frame
+        
+        ttk.Label(manage_frame, text="Manage Lecturer Accounts", 
+                 font=("Arial", 16, "bold")).pack(pady=(0, 20))
+        
+        # Lecturer list
+        list_frame = ttk.Frame(manage_frame)
+        list_frame.pack(fill=tk.BOTH, expand=True, pady=10)
+        
+        columns = ("id", "username", "role", "courses")
+        self.lecturer_tree = ttk.Treeview(list_frame, columns=columns, show="headings", height=8)
+        
+        self.lecturer_tree.heading("id", text="ID")
+        self.lecturer_tree.heading("username", text="Username")
+        self.lecturer_tree.heading("role", text="Role")
+        self.lecturer_tree.heading("courses", text="Courses")
+        
+        self.lecturer_tree.column("id", width=50, anchor=tk.CENTER)
+        self.lecturer_tree.column("username", width=150)
+        self.lecturer_tree.column("role", width=100)
+        self.lecturer_tree.column("courses", width=350)
+        
+        scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.lecturer_tree.yview)
+        self.lecturer_tree.configure(yscrollcommand=scrollbar.set)
+        
+        self.lecturer_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        
+        # Fill the form from the selected lecturer
+        self.lecturer_tree.bind("<<TreeviewSelect>>", self.select_lecturer)
+        
+        # Account form
+        form_frame = ttk.Frame(manage_frame)
+        form_frame.pack(fill=tk.X, pady=10)
+        
+        ttk.Label(form_frame, text="Username:").grid(column=0, row=0, sticky=tk.W, pady=5)
+        self.manage_username_var = tk.StringVar()
+        ttk.Entry(form_frame, textvariable=self.manage_username_var, width=30).grid(
+            column=1, row=0, sticky=tk.W, pady=5)
+        
+        ttk.Label(form_frame, text="Password:").grid(column=0, row=1, sticky=tk.W, pady=5)
+        self.manage_password_var = tk.StringVar()
+        ttk.Entry(form_frame, textvariable=self.manage_password_var, show='*', width=30).grid(
+            column=1, row=1, sticky=tk.W, pady=5)
+        ttk.Label(form_frame, text="Leave blank to keep the current password", 
+                 font=("Arial", 10, "italic")).grid(column=2, row=1, sticky=tk.W, padx=5)
+        
+        ttk.Label(form_frame, text="Role:").grid(column=0, row=2, sticky=tk.W, pady=5)
+        self.manage_role_var = tk.StringVar(value="lecturer")
+        ttk.Combobox(form_frame, textvariable=self.manage_role_var, values=ROLES, 
+                     state="readonly", width=27).grid(column=1, row=2, sticky=tk.W, pady=5)
+        
+        ttk.Label(form_frame, text="Courses (comma separated):").grid(column=0, row=3, sticky=tk.W, pady=5)
+        self.manage_courses_var = tk.StringVar()
+        ttk.Entry(form_frame, textvariable=self.manage_courses_var, width=50).grid(
+            column=1, row=3, columnspan=2, sticky=tk.W, pady=5)
+        
+        # Buttons
+        button_frame = ttk.Frame(manage_frame)
+        button_frame.pack(pady=10)
+        
+        ttk.Button(button_frame, text="Add Lecturer", 
+                  command=self.add_lecturer).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Update Selected", 
+                  command=self.update_selected_lecturer).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Delete Selected", 
+                  command=self.delete_selected_lecturer).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Back", 
+                  command=lambda: self.show_frame("lecturer_dashboard")).pack(side=tk.LEFT, padx=5)
+    
+    def create_reports_frame(self):
+        """Create the enrollment reports frame (for lecturer view)"""
+        reports_frame = ttk.Frame(self.root, padding="20")
+        self.frames["reports"] = reports_frame
+        
+        ttk.Label(reports_frame, text="Enrollment Reports", 
+                 font=("Arial", 16, "bold")).pack(pady=(0, 20))
+        
+        # One tab per report section, filled by load_reports
+        self.reports_notebook = ttk.Notebook(reports_frame)
+        self.reports_notebook.pack(fill=tk.BOTH, expand=True, pady=10)
+        self.report_trees = {}
+        
+        # Buttons
+        button_frame = ttk.Frame(reports_frame)
+        button_frame.pack(pady=10)
+        
+        ttk.Button(button_frame, text="Export HTML", 
+                  command=self.export_report_html).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Export CSV", 
+                  command=self.export_report_csv).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Back", 
+                  command=lambda: self.show_frame("lecturer_dashboard")).pack(side=tk.LEFT, padx=5)
     
     def create_student_details_frame(self):
         """Create the student details frame (for lecturer view)"""
@@ -312,7 +614,7 @@ class StudentManagementApp:
             ("Home Address", "update_home_address_var"),
             ("Term Time Address", "update_term_address_var"),
             ("Emergency Contact Name", "update_emergency_name_var"),
-            ("Emergency Contact Number", "update_emergency_number_var"),
+            ("Emergency Contact Number (e.g. +447700900123)", "update_emergency_number_var"),
             ("Course", "update_course_var")
         ]
         
@@ -351,28 +653,11 @@ class StudentManagementApp:
         emergency_number = self.reg_vars["emergency_number_var"].get().strip()
         course = self.reg_vars["course_var"].get().strip()
         
-        # Validate inputs
-        if not all([username, password, confirm_password, name, dob, home_address, 
-                    emergency_name, emergency_number, course]):
-            messagebox.showerror("Error", "All fields except Pronouns and Term Address are required.")
-            return
-        
         if password != confirm_password:
             messagebox.showerror("Error", "Passwords do not match.")
             return
         
-        if len(password) < 6:
-            messagebox.showerror("Error", "Password must be at least 6 characters long.")
-            return
-        
-        # Validate date format
-        try:
-            datetime.strptime(dob, "%Y-%m-%d")
-        except ValueError:
-            messagebox.showerror("Error", "Date of Birth must be in YYYY-MM-DD format.")
-            return
-        
-        # Register in database
+        # Register in database (field validation happens there)
         success, message = self.db.register_student(
             username, password, name, pronouns, dob, home_address, term_address,
             emergency_name, emergency_number, course
@@ -400,14 +685,45 @@ class StudentManagementApp:
         success, result = self.db.login_student(username, password)
         
         if success:
-            self.current_user = result  # student_id
-            self.user_type = "student"
+            self.start_session("student", result)  # result is the student_id
             self.student_username_var.set("")
             self.student_password_var.set("")
             self.show_frame("student_dashboard")
         else:
             messagebox.showerror("Login Failed", result)
     
+    def open_lecturer_login(self):
+        """Show lecturer login, or first-time admin setup if no admin exists"""
+        if self.db.has_admin():
+            self.show_frame("lecturer_login")
+        else:
+            self.show_frame("admin_setup")
+    
+    def create_first_admin(self):
+        """Create the first admin account"""
+        if self.db.has_admin():
+            self.show_frame("lecturer_login")
+            return
+        
+        username = self.admin_setup_vars["admin_username_var"].get().strip()
+        password = self.admin_setup_vars["admin_password_var"].get().strip()
+        confirm_password = self.admin_setup_vars["admin_confirm_password_var"].get().strip()
+        
+        if password != confirm_password:
+            messagebox.showerror("Error", "Passwords do not match.")
+            return
+        
+        success, message = self.db.create_lecturer(None, username, password, role="admin")
+
+        
+        if success:
+            messagebox.showinfo("Success", message)
+            for var in self.admin_setup_vars.values():
+                var.set("")
+            self.show_frame("lecturer_login")
+        else:
+            messagebox.showerror("Error", message)
+    
     def lecturer_login(self):
         """Handle lecturer login"""
         username = self.lecturer_username_var.get().strip()
@@ -420,18 +736,52 @@ class StudentManagementApp:
         success, result = self.db.login_lecturer(username, password)
         
         if success:
-            self.current_user = result  # lecturer_id
-            self.user_type = "lecturer"
             self.lecturer_username_var.set("")
             self.lecturer_password_var.set("")
+            # No session is started until a forced password change is done
+            if self.db.get_lecturer(result)['must_change_password']:
+                self.pending_password_change = (result, password)
+                self.show_frame("change_password")
+                return
+            self.start_session("lecturer", result)  # result is the lecturer_id
             self.show_frame("lecturer_dashboard")
         else:
             messagebox.showerror("Login Failed", result)
     
+    def change_password(self):
+        """Set a new password for a lecturer who must change theirs, then log them in"""
+        if not self.pending_password_change:
+            self.show_frame("lecturer_login")
+            return
+        
+        lecturer_id, current_password = self.pending_password_change
+        new_password = self.new_password_var.get().strip()
+        if new_password != self.confirm_new_password_var.get().strip():
+            messagebox.showerror("Error", "Passwords do not match.")
+            return
+        
+        success, message = self.db.change_lecturer_password(lecturer_id, current_password, new_password)
+        
+        if success:
+            self.pending_password_change = None
+            self.new_password_var.set("")
+            self.confirm_new_password_var.set("")
+            messagebox.showinfo("Success", message)
+            self.start_session("lecturer", lecturer_id)
+            self.show_frame("lecturer_dashboard")
+        else:
+            messagebox.showerror("Error", message)
+    
+    def cancel_password_change(self):
+        """Abandon a forced password change without logging in"""
+        self.pending_password_change = None
+        self.new_password_var.set("")
+        self.confirm_new_password_var.set("")
+        self.show_frame("lecturer_login")
+    
     def logout(self):
         """Handle user logout"""
-        self.current_user = None
-        self.user_type = None
+        self.end_session()
         self.show_frame("welcome")
     
     def load_student_data(self):
@@ -496,19 +846,7 @@ class StudentManagementApp:
         emergency_number = self.update_vars["update_emergency_number_var"].get().strip()
         course = self.update_vars["update_course_var"].get().strip()
         
-        # Validate required fields
-        if not all([name, dob, home_address, emergency_name, emergency_number, course]):
-            messagebox.showerror("Error", "All fields except Pronouns and Term Address are required.")
-            return
-        
-        # Validate date format
-        try:
-            datetime.strptime(dob, "%Y-%m-%d")
-        except ValueError:
-            messagebox.showerror("Error", "Date of Birth must be in YYYY-MM-DD format.")
-            return
-        
-        # Update in database
+        # Update in database (field validation happens there)
         update_data = {
             'name': name,
             'pronouns': pronouns,
@@ -536,9 +874,17 @@ class StudentManagementApp:
         # Clear existing data
         for row in self.student_tree.get_children():
             self.student_tree.delete(row)
+        self.search_status_var.set("")
+        
+        # Admins see everyone; lecturers only their own courses (filtered in SQL)
+        if self.refresh_role() == "admin":
+            self.lecturer_header_var.set("Lecturer Dashboard - All Students")
+            self.admin_button_frame.pack(side=tk.LEFT, before=self.lecturer_logout_button)
+        else:
+            self.lecturer_header_var.set("Lecturer Dashboard - My Students")
+            self.admin_button_frame.pack_forget()
         
-        # Get all students
-        students = self.db.get_all_students()
+        students = self.db.get_all_students(self.current_user)
         
         # Populate treeview
         for student in students:
@@ -550,29 +896,224 @@ class StudentManagementApp:
             ))
     
     def filter_students(self):
-        """Filter students based on search query"""
-        search_term = self.search_var.get().lower()
+        """Filter students based on search query, best matches first"""
+        search_term = self.search_var.get().strip()
+        
+        if not search_term:
+            self.load_all_students()
+            return
         
         # Clear treeview
         for row in self.student_tree.get_children():
             self.student_tree.delete(row)
         
-        # Get all students
-        students = self.db.get_all_students()
+        # Typo-tolerant search backed by the trigram index
+        students, truncated = self.db.search_students(search_term, lecturer_id=self.current_user)
+        if truncated:
+            self.search_status_var.set("Showing the closest name matches only; refine your search")
+        else:
+            self.search_status_var.set("")
         
-        # Filter and populate treeview
+        # Populate treeview
         for student in students:
-            if (search_term in str(student['id']).lower() or
-                search_term in student['username'].lower() or
-                search_term in student['name'].lower() or
-                search_term in student['course'].lower()):
+            self.student_tree.insert("", tk.END, values=(
+                student['id'],
+                student['username'],
+                student['name'],
+                student['course']
+            ))
+    
+    def load_reports(self):
+        """Load the enrollment reports into their tabs"""
+        if not self.current_user or self.user_type != "lecturer":
+            return
+        
+        # Reports read only the rollup tables, scoped to the lecturer's courses
+        self.report = build_report(self.db, lecturer_id=self.current_user)
+        
+        for key, title, headers, rows in self.report:
+            tree = self.report_trees.get(key)
+            if tree is None:
+                tab = ttk.Frame(self.reports_notebook, padding="10")
+                self.reports_notebook.add(tab, text=title)
                 
-                self.student_tree.insert("", tk.END, values=(
-                    student['id'],
-                    student['username'],
-                    student['name'],
-                    student['course']
-                ))
+                tree = ttk.Treeview(tab, columns=("label", "count"), show="headings", height=15)
+                tree.heading("label", text=headers[0])
+                tree.heading("count", text=headers[1])
+                tree.column("label", width=300)
+                tree.column("count", width=150, anchor=tk.CENTER)
+                
+                scrollbar = ttk.Scrollbar(tab, orient=tk.VERTICAL, command=tree.yview)
+                tree.configure(yscrollcommand=scrollbar.set)
+                tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+                scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+                self.report_trees[key] = tree
+            
+            for row in tree.get_children():
+                tree.delete(row)
+            for row in rows:
+                tree.insert("", tk.END, values=row)
+    
+    def export_report_html(self):
+        """Save the current reports as an HTML file"""
+        path = filedialog.asksaveasfilename(defaultextension=".html", 
+                                            initialfile="enrollment_report.html",
+                                            filetypes=[("HTML files", "*.html")])
+        if not path:
+            return
+        
+        try:
+            write_html(self.report, path)
+            messagebox.showinfo("Export", f"Report saved to {path}")
+        except OSError as e:
+            messagebox.showerror("Export", f"Error saving report: {str(e)}")
+    
+    def export_report_csv(self):
+        """Save the current reports as CSV files in a chosen folder"""
+        directory = filedialog.askdirectory()
+        if not directory:
+            return
+        
+        try:
+            paths = write_csv(self.report, directory)
+            messagebox.showinfo("Export", f"Saved {len(paths)} CSV files to {directory}")
+        except OSError as e:
+            messagebox.showerror("Export", f"Error saving report: {str(e)}")
+    
+    def load_all_lecturers(self):
+        """Load and display all lecturer accounts for admin view"""
+        if self.refresh_role() != "admin":
+            self.show_frame("lecturer_dashboard" if self.user_type == "lecturer" else "welcome")
+            return
+        
+        for row in self.lecturer_tree.get_children():
+            self.lecturer_tree.delete(row)
+        
+        for lecturer in self.db.get_all_lecturers():
+            self.lecturer_tree.insert("", tk.END, iid=lecturer['id'], values=(
+                lecturer['id'],
+                lecturer['username'],
+                lecturer['role'],
+                ", ".join(lecturer['courses'])
+            ))
+        
+        self.clear_lecturer_form()
+    
+    def clear_lecturer_form(self):
+        """Reset the lecturer account form"""
+        self.manage_username_var.set("")
+        self.manage_password_var.set("")
+        self.manage_role_var.set("lecturer")
+        self.manage_courses_var.set("")
+    
+    def select_lecturer(self, event):
+        """Fill the form with the selected lecturer's details"""
+        selected_item = self.lecturer_tree.selection()
+        if not selected_item:
+            return
+        
+        lecturer = self.db.get_lecturer(int(selected_item[0]))
+        if not lecturer:
+            return
+        
+        self.manage_username_var.set(lecturer['username'])
+        self.manage_password_var.set("")
+        self.manage_role_var.set(lecturer['role'])
+        self.manage_courses_var.set(", ".join(lecturer['courses']))
+    
+    def get_lecturer_form_courses(self):
+        """Parse the comma separated course list from the form"""
+        return [course.strip() for course in self.manage_courses_var.get().split(",") if course.strip()]
+    
+    def finish_lecturer_change(self, success, message):
+        """Report the result of an account change and reload the lecturer list"""
+        if success:
+            messagebox.showinfo("Success", message)
+            # Leaves this screen if the admin just demoted themselves
+            self.load_all_lecturers()
+        else:
+            messagebox.showerror("Error", message)
+            # Keep the form unless this admin was demoted or deleted elsewhere meanwhile
+            if self.refresh_role() != "admin":
+                self.load_all_lecturers()
+    
+    def add_lecturer(self):
+        """Create a lecturer account from the form"""
+        success, message = self.db.create_lecturer(
+            self.current_user,
+            self.manage_username_var.get().strip(),
+            self.manage_password_var.get().strip(),
+            self.manage_role_var.get(),
+            self.get_lecturer_form_courses()
+        )
+        self.finish_lecturer_change(success, message)
+    
+    def update_selected_lecturer(self):
+        """Save the form's role, courses and optional new password to the selected lecturer"""
+        selected_item = self.lecturer_tree.selection()
+        if not selected_item:
+            messagebox.showinfo("Information", "Please select a lecturer to update.")
+            return
+        
+        lecturer_id = int(selected_item[0])
+        success, message = self.db.update_lecturer(
+            self.current_user,
+            lecturer_id,
+            self.manage_role_var.get(),
+            self.get_lecturer_form_courses(),
+            self.manage_password_var.get().strip() or None
+        )
+        self.finish_lecturer_change(success, message)
+    
+    def delete_selected_lecturer(self):
+        """Delete the selected lecturer account"""
+        selected_item = self.lecturer_tree.selection()
+        if not selected_item:
+            messagebox.showinfo("Information", "Please select a lecturer to delete.")
+            return
+        
+        lecturer_id = int(selected_item[0])
+        if lecturer_id == self.current_user:
+            messagebox.showerror("Error", "You cannot delete your own account.")
+            return
+        
+        if not messagebox.askyesno("Confirm", "Delete the selected lecturer account?"):
+            return
+        
+        success, message = self.db.delete_lecturer(self.current_user, lecturer_id)
+        self.finish_lecturer_change(success, message)
+    
+    def backup_database(self):
+        """Take a database snapshot on a worker thread so the UI stays responsive"""
+        if self.refresh_role() != "admin":
+            return
+        
+        self.backup_button.state(["disabled"])
+        self.backup_result = None
+        
+        def run_backup():
+            try:
+                path = create_snapshot(self.db.db_name)
+                prune_snapshots(self.db.db_name)
+                self.backup_result = (True, f"Backup saved to {path}")
+            except Exception as e:
+                self.backup_result = (False, f"Backup failed: {str(e)}")
+        
+        threading.Thread(target=run_backup, daemon=True).start()
+        self.root.after(200, self.check_backup_finished)
+    
+    def check_backup_finished(self):
+        """Poll for the backup thread to finish and report the result"""
+        if self.backup_result is None:
+            self.root.after(200, self.check_backup_finished)
+            return
+        
+        self.backup_button.state(["!disabled"])
+        success, message = self.backup_result
+        if success:
+            messagebox.showinfo("Backup", message)
+        else:
+            messagebox.showerror("Backup", message)
     
     def view_selected_student(self):
         """View details of selected student"""
@@ -601,7 +1142,7 @@ class StudentManagementApp:
     
     def display_student_details(self, student_id):
         """Display detailed information about a student"""
-        student_data = self.db.get_student_data(student_id)
+        student_data = self.db.get_student_data(student_id, lecturer_id=self.current_user)
         
         if not student_data:
             messagebox.showerror("Error", "Failed to load student data.")
@@ -644,7 +1185,8 @@ def main():
     app = StudentManagementApp(root)
     root.mainloop()
     
-    # Clean up database connection
+    # Stop maintenance jobs and clean up database connection
+    app.scheduler.stop(timeout=STOP_TIMEOUT)
     app.db.close()
 
 
@@ -0,0 +1,240 @@
+import argparse
+import glob
+import gzip
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from datetime import datetime
+
+SNAPSHOT_SUFFIX = ".db.gz"
+
+
+def default_backup_dir(db_name):
+    """Return the backups directory that sits next to the database file"""
+    return os.path.join(os.path.dirname(os.path.abspath(db_name)), "backups")
+
+
+def _snapshot_prefix(db_name):
+    """Return the file name prefix used for snapshots of db_name"""
+    return os.path.splitext(os.path.basename(db_name))[0] + "_"
+
+
+# A paced copy starts over whenever another connection writes to the source,
+# so after this many restarts it falls back to copying in a single step
+MAX_BACKUP_RESTARTS = 3
+
+
+class _BackupRestarted(Exception):
+    """Raised from the progress callback to abandon a paced copy"""
+
+
+def _copy_database(source, target, pages, pause, cancelled=None):
+    """Copy source into target, a few pages at a time where that can finish"""
+    # In WAL mode a single-step copy only holds a read transaction, which
+    # doesn't block writers, so pacing would only risk endless restarts
+    journal_mode = source.execute("PRAGMA journal_mode").fetchone()[0]
+    if journal_mode.lower() == "wal" or pages <= 0:
+        source.backup(target)
+        return
+
+    last_remaining = None
+    restarts = 0
+
+    def progress(status, remaining, total):
+        nonlocal last_remaining, restarts
+        # Fail the same way an interrupted statement does
+        if cancelled is not None and cancelled():
+            raise sqlite3.OperationalError("interrupted")
+        # Remaining pages only stop shrinking when the copy has restarted
+        if last_remaining is not None and remaining >= last_remaining:
+            restarts += 1
+            if restarts >= MAX_BACKUP_RESTARTS:
+                raise _BackupRestarted()
+        last_remaining = remaining
+        # Give other threads (and other connections) a chance to run
+        if remaining and pause:
+            time.sleep(pause)
+
+    try:
+        source.backup(target, pages=pages, progress=progress)
+    except _BackupRestarted:
+        source.backup(target)
+
+
+def create_snapshot(db_name="university_data.db", backup_dir=None, pages=256, pause=0.005,
+                    source_conn=None, cancelled=None):
+    """Take an online, compressed snapshot of the database and return its path
+
+    cancelled, if given, is polled between paced steps and abandons the copy
+    when it returns True.
+    """
+    if backup_dir is None:
+        backup_dir = default_backup_dir(db_name)
+    os.makedirs(backup_dir, exist_ok=True)
+
+    # Microseconds keep two snapshots taken in the same second (e.g. the dashboard
+    # button during the scheduled job) apart
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+    snapshot_path = os.path.join(backup_dir, f"{_snapshot_prefix(db_name)}{timestamp}{SNAPSHOT_SUFFIX}")
+
+    fd, temp_path = tempfile.mkstemp(suffix=".db", dir=backup_dir)
+    os.close(fd)
+    try:
+        source = source_conn or sqlite3.connect(db_name, timeout=30)
+        target = sqlite3.connect(temp_path)
+        try:
+            # The backup API lets the live database keep serving while we copy
+            _copy_database(source, target, pages, pause, cancelled)
+            # Snapshots must be self-contained single files
+            target.execute("PRAGMA journal_mode=DELETE")
+        finally:
+            target.close()
+            if source_conn is None:
+                source.close()
+
+        # "x" refuses to overwrite an existing snapshot should names still collide
+        with open(temp_path, "rb") as raw, gzip.open(snapshot_path, "xb") as compressed:
+
+            shutil.copyfileobj(raw, compressed)
+    finally:
+        os.remove(temp_path)
+
+    return snapshot_path
+
+
+def list_snapshots(db_name="university_data.db", backup_dir=None):
+    """Return snapshot paths for db_name, oldest first"""
+    if backup_dir is None:
+        backup_dir = default_backup_dir(db_name)
+    pattern = os.path.join(backup_dir, f"{_snapshot_prefix(db_name)}*{SNAPSHOT_SUFFIX}")
+    # Timestamps in the file names sort chronologically
+    return sorted(glob.glob(pattern))
+
+
+def prune_snapshots(db_name="university_data.db", backup_dir=None, keep=7):
+    """Delete all but the newest `keep` snapshots and return the removed paths"""
+    snapshots = list_snapshots(db_name, backup_dir)
+    removed = snapshots[:-keep] if keep > 0 else snapshots
+    for path in removed:
+        os.remove(path)
+    return removed
+
+
+def _decompress(snapshot_path, target_dir=None):
+    """Decompress a snapshot to a temporary database file and return its path"""
+    fd, temp_path = tempfile.mkstemp(suffix=".db", dir=target_dir)
+    try:
+        with os.fdopen(fd, "wb") as raw, gzip.open(snapshot_path, "rb") as compressed:
+            shutil.copyfileobj(compressed, raw)
+    except Exception:
+        os.remove(temp_path)
+        raise
+    return temp_path
+
+
+def _check_integrity(db_path):
+    """Run PRAGMA integrity_check on db_path"""
+    conn = sqlite3.connect(db_path)
+    try:
+        rows = conn.execute("PRAGMA integrity_check").fetchall()
+    finally:
+        conn.close()
+    problems = [row[0] for row in rows if row[0] != "ok"]
+    if problems:
+        return False, "Integrity check failed: " + "; ".join(problems)
+    return True, "Snapshot is valid."
+
+
+def verify_snapshot(snapshot_path):
+    """Check that a snapshot decompresses and passes PRAGMA integrity_check"""
+    try:
+        temp_path = _decompress(snapshot_path)
+    except (OSError, EOFError) as e:
+        return False, f"Error reading snapshot: {str(e)}"
+    try:
+        return _check_integrity(temp_path)
+    except sqlite3.DatabaseError as e:
+        return False, f"Error: {str(e)}"
+    finally:
+        os.remove(temp_path)
+
+
+def restore_snapshot(snapshot_path, db_name="university_data.db", pages=256, pause=0.005):
+    """Verify a snapshot and copy it over the live database"""
+    try:
+        temp_path = _decompress(snapshot_path)
+    except (OSError, EOFError) as e:
+        return False, f"Error reading snapshot: {str(e)}"
+    try:
+        success, message = _check_integrity(temp_path)
+        if not success:
+            return False, message
+
+        # Restoring through the backup API keeps other connections consistent
+        source = sqlite3.connect(temp_path)
+        target = sqlite3.connect(db_name, timeout=30)
+        try:
+            _copy_database(source, target, pages, pause)
+        finally:
+            source.close()
+            target.close()
+        return True, f"Restored {os.path.basename(snapshot_path)}."
+    except sqlite3.DatabaseError as e:
+        return False, f"Error: {str(e)}"
+    finally:
+        os.remove(temp_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Back up and restore the university database")
+    parser.add_argument("--db", default="university_data.db", help="Path to the database file")
+    parser.add_argument("--backup-dir", default=None, help="Directory holding snapshots")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    create_parser = subparsers.add_parser("create", help="Take a new snapshot")
+    create_parser.add_argument("--pages", type=int, default=256,
+                               help="Pages copied per backup step")
+    create_parser.add_argument("--keep", type=int, default=None,
+                               help="Prune to this many snapshots afterwards")
+
+    subparsers.add_parser("list", help="List existing snapshots")
+
+    prune_parser = subparsers.add_parser("prune", help="Delete old snapshots")
+    prune_parser.add_argument("--keep", type=int, default=7, help="Number of snapshots to keep")
+
+    verify_parser = subparsers.add_parser("verify", help="Run an integrity check on a snapshot")
+    verify_parser.add_argument("snapshot", help="Path to the snapshot")
+
+    restore_parser = subparsers.add_parser("restore", help="Restore the database from a snapshot")
+    restore_parser.add_argument("snapshot", help="Path to the snapshot")
+
+    args = parser.parse_args()
+
+    if args.command == "create":
+        path = create_snapshot(args.db, args.backup_dir, pages=args.pages)
+        print(f"Created {path}")
+        if args.keep is not None:
+            for removed in prune_snapshots(args.db, args.backup_dir, args.keep):
+                print(f"Removed {removed}")
+    elif args.command == "list":
+        for path in list_snapshots(args.db, args.backup_dir):
+            print(path)
+    elif args.command == "prune":
+        for removed in prune_snapshots(args.db, args.backup_dir, args.keep):
+            print(f"Removed {removed}")
+    elif args.command == "verify":
+        success, message = verify_snapshot(args.snapshot)
+        print(message)
+        if not success:
+            raise SystemExit(1)
+    elif args.command == "restore":
+        success, message = restore_snapshot(args.snapshot, args.db)
+        print(message)
+        if not success:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,13 +2,40 @@ import sqlite3
 import hashlib
 import os
 from datetime import datetime
+from validation import (validate, normalize_phone, REGISTRATION_RULES, PROFILE_RULES,
+                        PROFILE_RULES_KEEP_PHONE, USERNAME_RULE, PASSWORD_RULE)
+from search import (words, trigrams, student_trigrams, min_shared, query_variants, match_score,
+                    DEFAULT_THRESHOLD)
+
+# Lecturer roles: admins see every student and manage lecturer accounts,
+# lecturers only see students on the courses assigned to them
+ROLES = ('admin', 'lecturer')
 
 class Database:
-    def __init__(self, db_name="university_data.db"):
+    # PBKDF2 rounds for password hashes (tools such as loadtest.py may lower this
+    # on scratch databases; changing it invalidates existing hashes)
+    password_iterations = 100000
+
+    def __init__(self, db_name="university_data.db", journal_mode="WAL"):
         """Initialize database connection"""
+        self.db_name = db_name
         self.conn = sqlite3.connect(db_name)
+        # WAL lets the maintenance worker read while the UI writes
+        self.conn.execute(f"PRAGMA journal_mode={journal_mode}")
         self.cursor = self.conn.cursor()
         self.create_tables()
+        
+        # Build the search index for databases created before it existed
+        self.cursor.execute("SELECT EXISTS(SELECT 1 FROM student_trigrams)")
+        if not self.cursor.fetchone()[0]:
+            self.rebuild_search_index()
+        
+        # Likewise fill the report rollups from existing students
+        self.cursor.execute('''
+        SELECT EXISTS(SELECT 1 FROM students) AND NOT EXISTS(SELECT 1 FROM registrations_daily)
+        ''')
+        if self.cursor.fetchone()[0]:
+            self.rebuild_report_rollups()
 
     def create_tables(self):
         """Create required tables if they don't exist"""
@@ -35,23 +62,168 @@ class Database:
         CREATE TABLE IF NOT EXISTS lecturers (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             username TEXT UNIQUE NOT NULL,
-            password TEXT NOT NULL
+            password TEXT NOT NULL,
+            role TEXT NOT NULL DEFAULT 'lecturer',
+            must_change_password INTEGER NOT NULL DEFAULT 0
         )
         ''')
         
-        # Check if default lecturer exists, if not create one
-        self.cursor.execute("SELECT * FROM lecturers WHERE username = 'admin'")
-        if not self.cursor.fetchone():
-            hashed_password = self._hash_password('admin123')
-            self.cursor.execute("INSERT INTO lecturers (username, password) VALUES (?, ?)", 
-                               ('admin', hashed_password))
+        # Add columns to lecturers tables created before roles existed
+        self.cursor.execute("PRAGMA table_info(lecturers)")
+        columns = [column[1] for column in self.cursor.fetchall()]
+        if 'role' not in columns:
+            self.cursor.execute("ALTER TABLE lecturers ADD COLUMN role TEXT NOT NULL DEFAULT 'lecturer'")
+            # The old seeded account becomes the first admin (see _flag_default_admin)
+            self.cursor.execute("UPDATE lecturers SET role = 'admin' WHERE username = 'admin'")
+        if 'must_change_password' not in columns:
+            self.cursor.execute('''
+            ALTER TABLE lecturers ADD COLUMN must_change_password INTEGER NOT NULL DEFAULT 0
+            ''')
+        
+        # Create lecturer to course assignments
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS lecturer_courses (
+            lecturer_id INTEGER NOT NULL,
+            course TEXT NOT NULL,
+            PRIMARY KEY (lecturer_id, course)
+        ) WITHOUT ROWID
+        ''')
+        
+        # Index course so lecturer-scoped queries only touch their own students
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_students_course ON students (course)")
         
+        # Create trigram index used for fuzzy name search
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS student_trigrams (
+            trigram TEXT NOT NULL,
+            student_id INTEGER NOT NULL,
+            PRIMARY KEY (trigram, student_id)
+        ) WITHOUT ROWID
+        ''')
+        self.cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_student_trigrams_student
+        ON student_trigrams (student_id)
+        ''')
+        
+        # Create report rollups: registrations per day and course, and students per
+        # birth year and course, so reports never have to scan the students table
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS registrations_daily (
+            day TEXT NOT NULL,
+            course TEXT NOT NULL,
+            registrations INTEGER NOT NULL,
+            PRIMARY KEY (day, course)
+        ) WITHOUT ROWID
+        ''')
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS students_by_birth_year (
+            course TEXT NOT NULL,
+            birth_year INTEGER NOT NULL,
+            students INTEGER NOT NULL,
+            PRIMARY KEY (course, birth_year)
+        ) WITHOUT ROWID
+        ''')
+        
+        # Keep the rollups current on every insert, update and delete, whichever
+        # code path makes the change
+        self.cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS students_rollup_insert AFTER INSERT ON students
+        BEGIN
+            INSERT INTO registrations_daily (day, course, registrations)
+            VALUES (substr(NEW.registration_date, 1, 10), NEW.course, 1)
+            ON CONFLICT (day, course) DO UPDATE SET registrations = registrations + 1;
+            INSERT INTO students_by_birth_year (course, birth_year, students)
+            VALUES (NEW.course, CAST(substr(NEW.dob, 1, 4) AS INTEGER), 1)
+            ON CONFLICT (course, birth_year) DO UPDATE SET students = students + 1;
+        END
+        ''')
+        self.cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS students_rollup_delete AFTER DELETE ON students
+        BEGIN
+            UPDATE registrations_daily SET registrations = registrations - 1
+            WHERE day = substr(OLD.registration_date, 1, 10) AND course = OLD.course;
+            UPDATE students_by_birth_year SET students = students - 1
+            WHERE course = OLD.course AND birth_year = CAST(substr(OLD.dob, 1, 4) AS INTEGER);
+            DELETE FROM registrations_daily WHERE registrations <= 0;
+            DELETE FROM students_by_birth_year WHERE students <= 0;
+        END
+        ''')
+        self.cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS students_rollup_update
+        AFTER UPDATE OF course, dob, registration_date ON students
+        WHEN OLD.course IS NOT NEW.course OR OLD.dob IS NOT NEW.dob
+             OR OLD.registration_date IS NOT NEW.registration_date
+        BEGIN
+            UPDATE registrations_daily SET registrations = registrations - 1
+            WHERE day = substr(OLD.registration_date, 1, 10) AND course = OLD.course;
+            UPDATE students_by_birth_year SET students = students - 1
+            WHERE course = OLD.course AND birth_year = CAST(substr(OLD.dob, 1, 4) AS INTEGER);
+            INSERT INTO registrations_daily (day, course, registrations)
+            VALUES (substr(NEW.registration_date, 1, 10), NEW.course, 1)
+            ON CONFLICT (day, course) DO UPDATE SET registrations = registrations + 1;
+            INSERT INTO students_by_birth_year (course, birth_year, students)
+            VALUES (NEW.course, CAST(substr(NEW.dob, 1, 4) AS INTEGER), 1)
+            ON CONFLICT (course, birth_year) DO UPDATE SET students = students + 1;
+            DELETE FROM registrations_daily WHERE registrations <= 0;
+            DELETE FROM students_by_birth_year WHERE students <= 0;
+        END
+        ''')
+        
+        # Create sessions table (managed by sessions.SessionStore)
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS sessions (
+            session_id TEXT PRIMARY KEY,
+            user_type TEXT NOT NULL,
+            user_id INTEGER NOT NULL,
+            created_at REAL NOT NULL,
+            expires_at REAL NOT NULL
+        ) WITHOUT ROWID
+        ''')
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_sessions_expires ON sessions (expires_at)")
+        
+        # Create settings table for app-wide values such as the session signing key
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS settings (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        )
+        ''')
+        
+        # Create maintenance log table (written by the maintenance scheduler)
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS maintenance_log (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            job TEXT NOT NULL,
+            started_at TEXT NOT NULL,
+            duration REAL NOT NULL,
+            success INTEGER NOT NULL,
+            message TEXT
+        )
+        ''')
+
+        self._flag_default_admin()
         self.conn.commit()
 
+    def _flag_default_admin(self):
+        """Force a password change on the old seeded admin/admin123 account if it still has it"""
+        # Checked once per database; the account is kept so existing deployments
+        # keep their admin, but it can't be used until the password is changed
+        self.cursor.execute("SELECT EXISTS(SELECT 1 FROM settings WHERE key = 'default_admin_checked')")
+        if self.cursor.fetchone()[0]:
+            return
+        self.cursor.execute("SELECT id, password FROM lecturers WHERE username = 'admin'")
+        result = self.cursor.fetchone()
+        if result and self._verify_password(result[1], 'admin123'):
+            self.cursor.execute("UPDATE lecturers SET must_change_password = 1 WHERE id = ?", (result[0],))
+            self.cursor.execute("DELETE FROM sessions WHERE user_type = 'lecturer' AND user_id = ?",
+                                (result[0],))
+        self.cursor.execute("INSERT INTO settings (key, value) VALUES ('default_admin_checked', '1')")
+
     def _hash_password(self, password):
         """Hash a password for secure storage"""
         salt = os.urandom(32)  # 32 bytes of random salt
-        key = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt, 100000)
+        key = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt,
+                                  self.password_iterations)
         return salt.hex() + ':' + key.hex()
 
     def _verify_password(self, stored_password, provided_password):
@@ -59,14 +231,24 @@ class Database:
         salt_hex, key_hex = stored_password.split(':')
         salt = bytes.fromhex(salt_hex)
         stored_key = bytes.fromhex(key_hex)
-        new_key = hashlib.pbkdf2_hmac('sha256', provided_password.encode('utf-8'), salt, 100000)
+        new_key = hashlib.pbkdf2_hmac('sha256', provided_password.encode('utf-8'), salt,
+                                      self.password_iterations)
         return new_key == stored_key
 
     def register_student(self, username, password, name, pronouns, dob, home_address,
                         term_address, emergency_name, emergency_number, course):
         """Register a new student"""
+        valid, message = validate({
+            'username': username, 'password': password, 'name': name, 'pronouns': pronouns,
+            'dob': dob, 'home_address': home_address, 'term_address': term_address,
+            'emergency_name': emergency_name, 'emergency_number': emergency_number, 'course': course
+        }, REGISTRATION_RULES)
+        if not valid:
+            return False, message
+        
         try:
             hashed_password = self._hash_password(password)
+            emergency_number = normalize_phone(emergency_number)
             registration_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             
             self.cursor.execute('''
@@ -75,12 +257,17 @@ class Database:
             VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             ''', (username, hashed_password, name, pronouns, dob, home_address, term_address, 
                  emergency_name, emergency_number, course, registration_date))
+            self._index_student(self.cursor.lastrowid, username, name)
             
             self.conn.commit()
             return True, "Registration successful!"
         except sqlite3.IntegrityError:
+            self.conn.rollback()
             return False, "Username already exists. Please choose a different one."
         except Exception as e:
+            # A failed commit (e.g. "database is locked") leaves the transaction
+            # open, holding its locks until something else commits it
+            self.conn.rollback()
             return False, f"Error: {str(e)}"
 
     def login_student(self, username, password):
@@ -111,13 +298,180 @@ class Database:
         else:
             return False, "Invalid username or password"
 
-    def get_student_data(self, student_id):
-        """Get data for a specific student"""
+    def has_admin(self):
+        """Check whether at least one admin account exists"""
+        self.cursor.execute("SELECT EXISTS(SELECT 1 FROM lecturers WHERE role = 'admin')")
+        return bool(self.cursor.fetchone()[0])
+
+    def is_admin(self, lecturer_id):
+        """Check whether lecturer_id is an existing admin account"""
+        self.cursor.execute("SELECT EXISTS(SELECT 1 FROM lecturers WHERE id = ? AND role = 'admin')",
+                            (lecturer_id,))
+        return bool(self.cursor.fetchone()[0])
+
+    def get_lecturer(self, lecturer_id):
+        """Get a lecturer's account details and assigned courses"""
+        self.cursor.execute('''
+        SELECT id, username, role, must_change_password FROM lecturers WHERE id = ?
+        ''', (lecturer_id,))
+        result = self.cursor.fetchone()
+        if not result:
+            return None
+        self.cursor.execute("SELECT course FROM lecturer_courses WHERE lecturer_id = ? ORDER BY course",
+                            (lecturer_id,))
+        return {
+            'id': result[0],
+            'username': result[1],
+            'role': result[2],
+            'must_change_password': bool(result[3]),
+            'courses': [row[0] for row in self.cursor.fetchall()]
+        }
+
+    def change_lecturer_password(self, lecturer_id, current_password, new_password):
+        """Change a lecturer's own password, clearing any forced password change"""
+        self.cursor.execute("SELECT password FROM lecturers WHERE id = ?", (lecturer_id,))
+        result = self.cursor.fetchone()
+        if not result or not self._verify_password(result[0], current_password):
+            return False, "Current password is incorrect."
+        message = PASSWORD_RULE.validate(new_password)
+        if message:
+            return False, message
+        if new_password == current_password:
+            return False, "New password must be different from the current one."
+        
+        try:
+            self.cursor.execute('''
+            UPDATE lecturers SET password = ?, must_change_password = 0 WHERE id = ?
+            ''', (self._hash_password(new_password), lecturer_id))
+            self.conn.commit()
+            return True, "Password changed!"
+        except Exception as e:
+            self.conn.rollback()
+            return False, f"Error changing password: {str(e)}"
+
+
+    def get_all_lecturers(self):
+        """Get all lecturer accounts with their assigned courses (for admin view)"""
         self.cursor.execute('''
+        SELECT l.id, l.username, l.role, GROUP_CONCAT(c.course, '\n')
+        FROM lecturers l LEFT JOIN lecturer_courses c ON c.lecturer_id = l.id
+        GROUP BY l.id
+        ORDER BY l.username
+        ''')
+        
+        lecturers = []
+        for row in self.cursor.fetchall():
+            lecturers.append({
+                'id': row[0],
+                'username': row[1],
+                'role': row[2],
+                'courses': sorted(row[3].split('\n')) if row[3] else []
+            })
+        return lecturers
+
+    def _set_lecturer_courses(self, lecturer_id, courses):
+        """Replace a lecturer's course assignments (caller commits)"""
+        self.cursor.execute("DELETE FROM lecturer_courses WHERE lecturer_id = ?", (lecturer_id,))
+        self.cursor.executemany(
+            "INSERT OR IGNORE INTO lecturer_courses (lecturer_id, course) VALUES (?, ?)",
+            [(lecturer_id, course) for course in courses if course])
+
+    def _is_last_admin(self, lecturer_id):
+        """Check whether lecturer_id is the only remaining admin"""
+        self.cursor.execute("SELECT id FROM lecturers WHERE role = 'admin'")
+        return [row[0] for row in self.cursor.fetchall()] == [lecturer_id]
+
+    def create_lecturer(self, acting_id, username, password, role='lecturer', courses=()):
+        """Create a lecturer account on behalf of admin acting_id
+
+        acting_id may only be None for the first admin, while no admin exists.
+        """
+        # Roles are re-read here since an admin may have been demoted elsewhere
+        if not (self.is_admin(acting_id) if acting_id is not None else not self.has_admin()):
+            return False, "Only admins can manage lecturer accounts."
+        if role not in ROLES:
+            return False, f"Role must be one of: {', '.join(ROLES)}."
+        valid, message = validate({'username': username, 'password': password},
+                                  [USERNAME_RULE, PASSWORD_RULE])
+        if not valid:
+            return False, message
+        
+        try:
+            self.cursor.execute("INSERT INTO lecturers (username, password, role) VALUES (?, ?, ?)",
+                                (username, self._hash_password(password), role))
+            self._set_lecturer_courses(self.cursor.lastrowid, courses)
+            self.conn.commit()
+            return True, "Lecturer account created!"
+        except sqlite3.IntegrityError:
+            self.conn.rollback()
+            return False, "Username already exists. Please choose a different one."
+        except Exception as e:
+            self.conn.rollback()
+            return False, f"Error: {str(e)}"
+
+    def update_lecturer(self, acting_id, lecturer_id, role, courses, password=None):
+        """Update a lecturer's role and courses, and optionally reset their password"""
+        if not self.is_admin(acting_id):
+            return False, "Only admins can manage lecturer accounts."
+        if role not in ROLES:
+            return False, f"Role must be one of: {', '.join(ROLES)}."
+        if role != 'admin' and self._is_last_admin(lecturer_id):
+            return False, "Cannot remove the admin role from the last admin."
+        message = PASSWORD_RULE.validate(password) if password else None
+        if message:
+            return False, message
+        
+        try:
+            self.cursor.execute("UPDATE lecturers SET role = ? WHERE id = ?", (role, lecturer_id))
+            if password:
+                self.cursor.execute("UPDATE lecturers SET password = ? WHERE id = ?",
+                                    (self._hash_password(password), lecturer_id))
+            self._set_lecturer_courses(lecturer_id, courses)
+            self.conn.commit()
+            return True, "Lecturer account updated!"
+        except Exception as e:
+            self.conn.rollback()
+            return False, f"Error updating lecturer: {str(e)}"
+
+    def delete_lecturer(self, acting_id, lecturer_id):
+        """Delete a lecturer account with its course assignments and sessions"""
+        if not self.is_admin(acting_id):
+            return False, "Only admins can manage lecturer accounts."
+        if self._is_last_admin(lecturer_id):
+            return False, "Cannot delete the last admin account."
+        
+        try:
+            self.cursor.execute("DELETE FROM lecturer_courses WHERE lecturer_id = ?", (lecturer_id,))
+            self.cursor.execute("DELETE FROM sessions WHERE user_type = 'lecturer' AND user_id = ?",
+                                (lecturer_id,))
+
+            self.cursor.execute("DELETE FROM lecturers WHERE id = ?", (lecturer_id,))
+            self.conn.commit()
+            return True, "Lecturer account deleted."
+        except Exception as e:
+            self.conn.rollback()
+            return False, f"Error deleting lecturer: {str(e)}"
+
+    def _visibility_scope(self, lecturer_id, course_column="course"):
+        """Return an SQL condition and params limiting students to those a lecturer may see"""
+        # No lecturer (e.g. a student viewing their own record) or an admin: no restriction
+        if lecturer_id is None:
+            return "", ()
+        self.cursor.execute("SELECT role FROM lecturers WHERE id = ?", (lecturer_id,))
+        result = self.cursor.fetchone()
+        if result and result[0] == 'admin':
+            return "", ()
+        return (f"{course_column} IN (SELECT course FROM lecturer_courses WHERE lecturer_id = ?)",
+                (lecturer_id,))
+
+    def get_student_data(self, student_id, lecturer_id=None):
+        """Get data for a specific student (only if visible to lecturer_id, when given)"""
+        scope, scope_params = self._visibility_scope(lecturer_id)
+        self.cursor.execute(f'''
         SELECT username, name, pronouns, dob, home_address, term_address, 
                emergency_name, emergency_number, course
-        FROM students WHERE id = ?
-        ''', (student_id,))
+        FROM students WHERE id = ? {"AND " + scope if scope else ""}
+        ''', (student_id, *scope_params))
         
         result = self.cursor.fetchone()
         if result:
@@ -134,13 +488,14 @@ class Database:
             }
         return None
 
-    def get_all_students(self):
-        """Get data for all students (for lecturer view)"""
-        self.cursor.execute('''
+    def get_all_students(self, lecturer_id=None):
+        """Get data for all students visible to lecturer_id (for lecturer view)"""
+        scope, scope_params = self._visibility_scope(lecturer_id)
+        self.cursor.execute(f'''
         SELECT id, username, name, pronouns, dob, home_address, term_address, 
                emergency_name, emergency_number, course
-        FROM students
-        ''')
+        FROM students {"WHERE " + scope if scope else ""}
+        ''', scope_params)
         
         students = []
         for row in self.cursor.fetchall():
@@ -160,6 +515,21 @@ class Database:
 
     def update_student_data(self, student_id, data):
         """Update student data"""
+        # Only enforce E.164 (and normalise) when the emergency number is changed
+        emergency_number = data['emergency_number']
+        self.cursor.execute("SELECT emergency_number FROM students WHERE id = ?", (student_id,))
+        result = self.cursor.fetchone()
+        if result and emergency_number == result[0]:
+            rules = PROFILE_RULES_KEEP_PHONE
+        else:
+            rules = PROFILE_RULES
+        
+        valid, message = validate(data, rules)
+        if not valid:
+            return False, message
+        if rules is PROFILE_RULES:
+            emergency_number = normalize_phone(emergency_number)
+        
         try:
             self.cursor.execute('''
             UPDATE students SET
@@ -179,16 +549,168 @@ class Database:
                 data['home_address'],
                 data['term_address'],
                 data['emergency_name'],
-                data['emergency_number'],
+                emergency_number,
                 data['course'],
                 student_id
             ))
             
+            self.cursor.execute("SELECT username FROM students WHERE id = ?", (student_id,))
+            result = self.cursor.fetchone()
+            if result:
+                self._index_student(student_id, result[0], data['name'])
+            
             self.conn.commit()
             return True, "Data updated successfully!"
         except Exception as e:
+            self.conn.rollback()
             return False, f"Error updating data: {str(e)}"
 
+
+    def _index_student(self, student_id, username, name):
+        """Replace the search index entries for one student (caller commits)"""
+        self.cursor.execute("DELETE FROM student_trigrams WHERE student_id = ?", (student_id,))
+        self.cursor.executemany(
+            "INSERT INTO student_trigrams (trigram, student_id) VALUES (?, ?)",
+            [(trigram, student_id) for trigram in student_trigrams(username, name)])
+
+    def rebuild_search_index(self):
+        """Rebuild the trigram index for every student"""
+        self.cursor.execute("DELETE FROM student_trigrams")
+        rows = self.conn.execute("SELECT id, username, name FROM students")
+        self.cursor.executemany(
+            "INSERT INTO student_trigrams (trigram, student_id) VALUES (?, ?)",
+            ((trigram, student_id)
+             for student_id, username, name in rows
+             for trigram in student_trigrams(username, name)))
+        self.conn.commit()
+
+    def rebuild_report_rollups(self):
+        """Recompute the report rollup tables from the students table"""
+        self.cursor.execute("DELETE FROM registrations_daily")
+        self.cursor.execute("DELETE FROM students_by_birth_year")
+        self.cursor.execute('''
+        INSERT INTO registrations_daily (day, course, registrations)
+        SELECT substr(registration_date, 1, 10), course, COUNT(*)
+        FROM students GROUP BY 1, 2
+        ''')
+        self.cursor.execute('''
+        INSERT INTO students_by_birth_year (course, birth_year, students)
+        SELECT course, CAST(substr(dob, 1, 4) AS INTEGER), COUNT(*)
+        FROM students GROUP BY 1, 2
+        ''')
+        self.conn.commit()
+
+    def get_registrations_per_day(self, lecturer_id=None, start_day=None, end_day=None):
+        """Get (day, registrations) pairs from the rollups, oldest first"""
+        scope, scope_params = self._visibility_scope(lecturer_id)
+        conditions, params = [], []
+        if scope:
+            conditions.append(scope)
+            params.extend(scope_params)
+        if start_day:
+            conditions.append("day >= ?")
+            params.append(start_day)
+        if end_day:
+            conditions.append("day <= ?")
+            params.append(end_day)
+        where = "WHERE " + " AND ".join(conditions) if conditions else ""
+        
+        self.cursor.execute(f'''
+        SELECT day, SUM(registrations) FROM registrations_daily {where}
+        GROUP BY day ORDER BY day
+        ''', params)
+        return self.cursor.fetchall()
+
+    def get_registrations_per_course(self, lecturer_id=None):
+        """Get (course, registrations) pairs from the rollups, largest first"""
+        scope, scope_params = self._visibility_scope(lecturer_id)
+        self.cursor.execute(f'''
+        SELECT course, SUM(registrations) FROM registrations_daily
+        {"WHERE " + scope if scope else ""}
+        GROUP BY course ORDER BY 2 DESC, course
+        ''', scope_params)
+        return self.cursor.fetchall()
+
+    def get_birth_year_counts(self, lecturer_id=None):
+        """Get (birth_year, students) pairs from the rollups, oldest first"""
+        scope, scope_params = self._visibility_scope(lecturer_id)
+        self.cursor.execute(f'''
+        SELECT birth_year, SUM(students) FROM students_by_birth_year
+        {"WHERE " + scope if scope else ""}
+        GROUP BY birth_year ORDER BY birth_year
+        ''', scope_params)
+        return self.cursor.fetchall()
+
+    def search_students(self, query, lecturer_id=None, limit=100, threshold=DEFAULT_THRESHOLD):
+        """Search students by ID, fuzzy name/username match or course; returns (students, truncated)"""
+        # Only the fuzzy name matches are capped at limit; truncated says some were left out
+        query = query.strip()
+        scope, scope_params = self._visibility_scope(lecturer_id, "s.course")
+        scope_sql = "AND " + scope if scope else ""
+        results = []
+        seen = set()
+        truncated = False
+
+        def add(row):
+            if row[0] not in seen:
+                seen.add(row[0])
+                results.append({'id': row[0], 'username': row[1], 'name': row[2], 'course': row[3]})
+
+        # Exact student ID
+        if query.isdigit():
+            self.cursor.execute(f'''
+            SELECT id, username, name, course FROM students s WHERE id = ? {scope_sql}
+            ''', (int(query), *scope_params))
+            for row in self.cursor.fetchall():
+                add(row)
+
+        # Fuzzy name/username match: let the index pick candidates sharing enough
+        # trigrams with the query or a variant of it with two letters swapped, then
+        # rank only those few rows by edit distance in Python
+        query_words = words(query)
+        if query_words:
+            variants = [trigrams(variant) for variant in query_variants(query)]
+            # A student passing the cutoff for any one variant also passes the
+            # lowest cutoff against their union, so one indexed query covers them all
+            required = min(min_shared(variant, threshold) for variant in variants)
+            rows = self._trigram_candidates(set().union(*variants), required, limit * 5,
+                                            scope_sql, scope_params)
+            scored = sorted(rows, key=lambda row: min(match_score(query_words, variants, row[1]),
+                                                      match_score(query_words, variants, row[2])))
+            # Every candidate is a match, so this also covers SQL hitting its cap
+            truncated = len(scored) > limit
+            for row in scored[:limit]:
+                add(row)
+
+        # Course substring match (uncapped, so a whole course can be listed)
+        pattern = query.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        self.cursor.execute(f'''
+        SELECT id, username, name, course FROM students s
+        WHERE course LIKE ? ESCAPE '\\' {scope_sql}
+        ''', ('%' + pattern + '%', *scope_params))
+        for row in self.cursor.fetchall():
+            add(row)
+
+        return results, truncated
+
+    def _trigram_candidates(self, query_trigrams, required, max_rows, scope_sql="", scope_params=()):
+        """Return up to max_rows students sharing at least required of the query trigrams"""
+        placeholders = ", ".join("?" * len(query_trigrams))
+        self.cursor.execute(f'''
+        SELECT s.id, s.username, s.name, s.course
+        FROM (
+            SELECT t.student_id, COUNT(*) AS shared
+            FROM student_trigrams t JOIN students s ON s.id = t.student_id
+            WHERE t.trigram IN ({placeholders}) {scope_sql}
+            GROUP BY t.student_id
+            HAVING shared >= ?
+            ORDER BY shared DESC
+            LIMIT ?
+        ) AS candidates
+        JOIN students s ON s.id = candidates.student_id
+        ''', (*query_trigrams, *scope_params, required, max_rows))
+        return self.cursor.fetchall()
+
     def close(self):
         """Close the database connection"""
         self.conn.close()
\ No newline at end of file
@@ -0,0 +1,259 @@
+import argparse
+import multiprocessing
+import os
+import random
+import sqlite3
+import threading
+import time
+
+from db import Database
+
+SEED_PASSWORD = "loadtest-pass"
+OPERATIONS = ("register", "login", "read", "update")
+DEFAULT_MIX = "register=1,login=3,read=5,update=1"
+DEFAULT_RAMP = "10:4,20:16,10:32"
+
+
+def parse_mix(text):
+    """Parse 'register=1,login=3,...' into (operations, weights)"""
+    operations, weights = [], []
+    for part in text.split(","):
+        name, weight = part.split("=")
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise argparse.ArgumentTypeError(f"Unknown operation '{name}', expected one of {OPERATIONS}")
+        operations.append(name)
+        weights.append(float(weight))
+    return operations, weights
+
+
+def parse_ramp(text):
+    """Parse 'seconds:workers,...' into a list of (end_offset, workers) stages"""
+    stages, elapsed = [], 0.0
+    for part in text.split(","):
+        seconds, workers = part.split(":")
+        elapsed += float(seconds)
+        stages.append((elapsed, int(workers)))
+    return stages
+
+
+def active_workers(stages, offset):
+    """Return how many workers should be running at offset seconds, or None when done"""
+    for end, workers in stages:
+        if offset < end:
+            return workers
+    return None
+
+
+def is_lock_error(message):
+    """Check whether an error message is SQLite lock contention"""
+    # Covers both "database is locked" and "database table is locked"
+    return "is locked" in message
+
+
+def open_database(args):
+    """Open a Database configured with the settings under test"""
+    db = Database(args.db, journal_mode=args.journal_mode)
+    db.password_iterations = args.hash_iterations
+    db.conn.execute(f"PRAGMA busy_timeout = {int(args.busy_timeout * 1000)}")
+    db.conn.execute(f"PRAGMA synchronous = {args.synchronous}")
+    return db
+
+
+def seed_database(args):
+    """Create the scratch database and the students used by login/read/update"""
+    if os.path.exists(args.db) and not args.keep_db:
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(args.db + suffix):
+                os.remove(args.db + suffix)
+
+    db = open_database(args)
+    # One hash is enough: every seeded student shares the same password
+    hashed_password = db._hash_password(SEED_PASSWORD)
+    db.cursor.executemany('''
+    INSERT OR IGNORE INTO students (username, password, name, pronouns, dob, home_address,
+                                    term_address, emergency_name, emergency_number, course,
+                                    registration_date)
+    VALUES (?, ?, ?, '', '2000-01-01', '1 Seed Street', '', 'Seed Contact', '+447700900123', ?, ?)
+    ''', [(f"seed_{i}", hashed_password, f"Seed Student {i}", f"Course {i % 10}",
+           time.strftime("%Y-%m-%d %H:%M:%S")) for i in range(args.students)])
+    db.conn.commit()
+    db.rebuild_search_index()
+    db.close()
+
+
+def run_operation(db, operation, worker_id, counter, students):
+    """Run one operation, returning (success, error message)"""
+    if operation == "register":
+        username = f"load_{os.getpid()}_{worker_id}_{counter}"
+        return db.register_student(username, SEED_PASSWORD, f"Load Student {counter}", "",
+                                   "2000-01-01", "1 Load Street", "", "Load Contact",
+                                   "+447700900123", f"Course {counter % 10}")
+
+    student = random.randrange(students)
+    if operation == "login":
+        success, result = db.login_student(f"seed_{student}", SEED_PASSWORD)
+        return success, "" if success else result
+    if operation == "read":
+        return db.get_student_data(student + 1) is not None, "Student not found"
+
+    data = db.get_student_data(student + 1)
+    if data is None:
+        return False, "Student not found"
+    data['term_address'] = f"{counter} Term Street"
+    return db.update_student_data(student + 1, data)
+
+
+def worker(args, worker_id, start_at, results):
+    """Run operations until the ramp profile ends, recording one result per operation"""
+    operations, weights = parse_mix(args.mix)
+    stages = parse_ramp(args.ramp)
+    db = open_database(args)
+    counter = 0
+    try:
+        while True:
+            offset = time.time() - start_at
+            workers = active_workers(stages, offset)
+            if workers is None:
+                break
+            if offset < 0 or worker_id >= workers:
+                time.sleep(0.05)
+                continue
+
+            operation = random.choices(operations, weights)[0]
+            counter += 1
+            started = time.perf_counter()
+            try:
+                success, message = run_operation(db, operation, worker_id, counter, args.students)
+            except sqlite3.Error as e:
+                success, message = False, str(e)
+            if not success:
+                # Never let a failed operation's open transaction (and its locks)
+                # leak into the next one
+                db.conn.rollback()
+            latency = time.perf_counter() - started
+
+            results.append((offset, operation, latency, success,
+                            not success and is_lock_error(message)))
+    finally:
+        db.close()
+
+
+def run_process(args, worker_ids, start_at, queue):
+    """Run a group of worker threads in one process and send back their results"""
+    results = []  # list.append is atomic, so threads can share it
+    threads = [threading.Thread(target=worker, args=(args, worker_id, start_at, results))
+               for worker_id in worker_ids]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    queue.put(results)
+
+
+def percentile(sorted_values, p):
+    """Return the p-th percentile of already sorted values (nearest rank)"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(p / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def summarize(results):
+    """Return the operation count, latency percentiles (ms) and error counts"""
+    latencies = sorted(result[2] * 1000 for result in results)
+    return {
+        'count': len(results),
+        'errors': sum(1 for result in results if not result[3]),
+        'locked': sum(1 for result in results if result[4]),
+        'p50': percentile(latencies, 50),
+        'p95': percentile(latencies, 95),
+        'p99': percentile(latencies, 99),
+    }
+
+
+def print_report(results, stages, window):
+    """Print per-window and per-operation throughput, latency and lock errors"""
+    header = (f"{'':>12} {'ops':>7} {'ops/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+              f"{'errors':>7} {'locked':>7}")
+
+    def row(label, summary, seconds):
+        return (f"{label:>12} {summary['count']:>7} {summary['count'] / seconds:>8.1f} "
+                f"{summary['p50']:>8.1f} {summary['p95']:>8.1f} {summary['p99']:>8.1f} "
+                f"{summary['errors']:>7} {summary['locked']:>7}")
+
+    total_seconds = stages[-1][0]
+    windows = {}
+    for result in results:
+        windows.setdefault(int(result[0] // window), []).append(result)
+
+    print("Over time")
+    print(header)
+    for index in range(int(total_seconds // window) + (total_seconds % window > 0)):
+        start = index * window
+        workers = active_workers(stages, start)
+        label = f"{start:.0f}s ({workers}w)"
+        print(row(label, summarize(windows.get(index, [])), min(window, total_seconds - start)))
+
+    print()
+    print("By operation")
+    print(header)
+    for operation in OPERATIONS:
+        operation_results = [result for result in results if result[1] == operation]
+        if operation_results:
+            print(row(operation, summarize(operation_results), total_seconds))
+    print(row("total", summarize(results), total_seconds))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate concurrent users against the Database layer")
+    parser.add_argument("--db", default="loadtest_university_data.db",
+                        help="Scratch database file (recreated unless --keep-db)")
+    parser.add_argument("--keep-db", action="store_true", help="Reuse an existing scratch database")
+    parser.add_argument("--students", type=int, default=1000, help="Students seeded before the run")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Operation weights, e.g. " + DEFAULT_MIX)
+    parser.add_argument("--ramp", default=DEFAULT_RAMP,
+                        help="Ramp profile as seconds:workers stages, e.g. " + DEFAULT_RAMP)
+    parser.add_argument("--processes", type=int, default=1, help="Processes to spread workers over")
+    parser.add_argument("--window", type=float, default=5, help="Report window in seconds")
+    parser.add_argument("--journal-mode", default="wal",
+                        choices=["wal", "delete", "truncate", "persist", "memory"])
+    parser.add_argument("--synchronous", default="normal", choices=["off", "normal", "full"])
+    parser.add_argument("--busy-timeout", type=float, default=5.0, help="SQLite busy timeout in seconds")
+    parser.add_argument("--hash-iterations", type=int, default=Database.password_iterations,
+                        help="PBKDF2 iterations for password hashing")
+    args = parser.parse_args()
+
+    # Validate the profiles before starting anything
+    parse_mix(args.mix)
+    stages = parse_ramp(args.ramp)
+    if os.path.abspath(args.db) == os.path.abspath("university_data.db"):
+        parser.error("refusing to run against the live database; pass a scratch --db")
+
+    print(f"Seeding {args.students} students into {args.db}...")
+    seed_database(args)
+
+    max_workers = max(workers for end, workers in stages)
+    processes = max(1, min(args.processes, max_workers))
+    start_at = time.time() + 1  # Give every process time to start
+    queue = multiprocessing.Queue()
+    children = []
+    for process_index in range(processes):
+        worker_ids = list(range(process_index, max_workers, processes))
+        child = multiprocessing.Process(target=run_process, args=(args, worker_ids, start_at, queue))
+        child.start()
+        children.append(child)
+
+    print(f"Running {max_workers} workers over {processes} process(es) for {stages[-1][0]:.0f}s...")
+    results = []
+    for child in children:
+        results.extend(queue.get())
+    for child in children:
+        child.join()
+
+    print()
+    print_report(results, stages, args.window)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+import argparse
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from backup import create_snapshot, prune_snapshots
+from db import Database
+from sessions import reap_expired_sessions
+
+# Default job intervals (in seconds)
+HOUR = 60 * 60
+DAY = 24 * HOUR
+WEEK = 7 * DAY
+
+# Longest time stop() waits for a running job before giving up on it
+STOP_TIMEOUT = 5
+
+# Logged for idle-only jobs cut short by user activity; they are retried once
+# the app is idle again instead of waiting for their next interval
+INTERRUPTED_MESSAGE = "Interrupted by user activity"
+
+
+def checkpoint_wal(conn):
+    """Copy WAL frames back into the main database file without blocking writers"""
+    conn.execute("PRAGMA wal_checkpoint(PASSIVE)")
+
+
+def optimize(conn):
+    """Let SQLite refresh statistics for tables whose queries would benefit"""
+    conn.execute("PRAGMA optimize")
+
+
+def analyze(conn):
+    """Rebuild the query planner statistics for every table and index"""
+    conn.execute("ANALYZE")
+
+
+def vacuum(conn):
+    """Rebuild the database file to reclaim free pages"""
+    conn.execute("VACUUM")
+
+
+def snapshot(conn, db_name, backup_dir=None, keep=7, cancelled=None):
+    """Take a compressed snapshot of the database and prune old ones"""
+    create_snapshot(db_name, backup_dir, source_conn=conn, cancelled=cancelled)
+    prune_snapshots(db_name, backup_dir, keep)
+
+
+class MaintenanceJob:
+    def __init__(self, name, func, interval, idle_only=True):
+        """Describe a maintenance task and how often it should run"""
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.idle_only = idle_only  # Only run when nobody is using the UI
+        self.last_run = None  # time.time() of the last run
+
+    def is_due(self, now):
+        """Check whether the job's interval has elapsed"""
+        return self.last_run is None or now - self.last_run >= self.interval
+
+
+class MaintenanceScheduler:
+    def __init__(self, db_name="university_data.db", idle_seconds=60, poll_interval=5):
+        """Initialize the scheduler (call start() to launch the worker thread)"""
+        self.db_name = db_name
+        self.idle_seconds = idle_seconds
+        self.poll_interval = poll_interval
+        self.jobs = []
+        self._last_activity = time.monotonic()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._running = None  # (job, connection) while a job runs
+        self._interrupted = threading.Event()
+        self._pending_log = []  # Job runs not yet written to maintenance_log
+
+    def add_job(self, name, func, interval, idle_only=True):
+        """Register a job; func receives a dedicated sqlite3 connection"""
+        job = MaintenanceJob(name, func, interval, idle_only)
+        self.jobs.append(job)
+        return job
+
+    def add_default_jobs(self, backup_dir=None):
+        """Register the standard set of maintenance jobs"""
+        # A passive checkpoint never takes the write lock, so it may run at any time
+        self.add_job("wal_checkpoint", checkpoint_wal, 10 * 60, idle_only=False)
+        # Everything else writes (or is heavy enough to slow the UI down), so it
+        # only runs while the app is idle and is interrupted when the user returns
+        self.add_job("reap_sessions", reap_expired_sessions, HOUR)
+        self.add_job("optimize", optimize, HOUR)
+        self.add_job("analyze", analyze, DAY)
+        self.add_job("backup", lambda conn: snapshot(conn, self.db_name, backup_dir,
+                                                     cancelled=self._interrupted.is_set), DAY)
+        self.add_job("vacuum", vacuum, WEEK)
+
+    def touch(self):
+        """Record user activity, postponing idle-only jobs and interrupting a running one"""
+        self._last_activity = time.monotonic()
+        with self._lock:
+            if self._running and self._running[0].idle_only:
+                self._interrupted.set()
+                # Safe from any thread; the job's statement fails with "interrupted"
+                self._running[1].interrupt()
+
+    def is_idle(self):
+        """Check whether the app has been idle long enough to run heavy jobs"""
+        return time.monotonic() - self._last_activity >= self.idle_seconds
+
+    def start(self):
+        """Start the worker thread"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._load_last_runs()
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="maintenance", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=STOP_TIMEOUT):
+        """Ask the worker thread to finish and wait (at most timeout seconds) for it"""
+        # A job in progress (e.g. VACUUM) can't be interrupted; the worker is a
+        # daemon thread, so giving up on it doesn't keep the process alive
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout)
+            # Only write the log once the worker is done, as a job it is still
+            # running may hold the write lock
+            if not self._thread.is_alive():
+                self.flush_log()
+            self._thread = None
+
+    def _run(self):
+        """Worker thread loop"""
+        while not self._stop_event.wait(self.poll_interval):
+            self.run_pending()
+
+    def run_pending(self):
+        """Run every job that is due, skipping heavy jobs while the app is in use"""
+        for job in self.jobs:
+            if self._stop_event.is_set():
+                break
+            if not job.is_due(time.time()):
+                continue
+            # Re-check before every job since the user may have come back meanwhile
+            if job.idle_only and not self.is_idle():
+                continue
+            self.run_job(job)
+        
+        # Logging is a write too, so it waits for the app to be idle
+        if self._pending_log and self.is_idle():
+            self.flush_log()
+
+    def run_job(self, job):
+        """Run a single job on its own connection and record how long it took"""
+        started_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        start = time.perf_counter()
+        conn = sqlite3.connect(self.db_name, timeout=30)
+        self._interrupted.clear()
+        with self._lock:
+            self._running = (job, conn)
+        try:
+            job.func(conn)
+            success, message = True, ""
+        except Exception as e:
+            success, message = False, f"Error: {str(e)}"
+        finally:
+            with self._lock:
+                self._running = None
+            conn.close()
+        duration = time.perf_counter() - start
+
+        if not success and self._interrupted.is_set():
+            message = INTERRUPTED_MESSAGE
+        else:
+            # Failed jobs are retried on the next interval rather than on every poll,
+            # only interrupted ones are retried as soon as the app is idle again
+            job.last_run = time.time()
+        self._record_run(job.name, started_at, duration, success, message)
+        return success, message
+
+    def _record_run(self, job_name, started_at, duration, success, message):
+        """Queue the outcome of a job run for the maintenance_log table"""
+        with self._lock:
+            self._pending_log.append((job_name, started_at, duration, int(success), message))
+
+    def flush_log(self):
+        """Write queued job runs to the maintenance_log table in one transaction"""
+        with self._lock:
+            rows, self._pending_log = self._pending_log, []
+        if not rows:
+            return
+        conn = sqlite3.connect(self.db_name, timeout=30)
+        try:
+            conn.executemany('''
+            INSERT INTO maintenance_log (job, started_at, duration, success, message)
+            VALUES (?, ?, ?, ?, ?)
+            ''', rows)
+            conn.commit()
+        except sqlite3.Error:
+            pass  # Logging must never take the scheduler down
+        finally:
+            conn.close()
+
+    def _load_last_runs(self):
+        """Restore last run times from the log so intervals survive restarts"""
+        conn = sqlite3.connect(self.db_name, timeout=30)
+        try:
+            rows = conn.execute('''
+            SELECT job, MAX(started_at) FROM maintenance_log WHERE message IS NOT ? GROUP BY job
+            ''', (INTERRUPTED_MESSAGE,)).fetchall()
+        except sqlite3.Error:
+            rows = []
+        finally:
+            conn.close()
+
+        last_runs = {}
+        for job_name, started_at in rows:
+            last_runs[job_name] = datetime.strptime(started_at, "%Y-%m-%d %H:%M:%S").timestamp()
+        for job in self.jobs:
+            if job.name in last_runs:
+                job.last_run = last_runs[job.name]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run database maintenance jobs without the UI")
+    parser.add_argument("--db", default="university_data.db", help="Path to the database file")
+    parser.add_argument("--backup-dir", default=None, help="Directory for backup snapshots")
+    parser.add_argument("--poll-interval", type=int, default=60,
+                        help="Seconds between checks for due jobs")
+    parser.add_argument("--once", action="store_true",
+                        help="Run every job once and exit instead of running as a daemon")
+    args = parser.parse_args()
+
+    # Make sure the schema (including maintenance_log) exists
+    Database(args.db).close()
+
+    # There is no UI to wait for, so every job is allowed to run as soon as it is due
+    scheduler = MaintenanceScheduler(args.db, idle_seconds=0, poll_interval=args.poll_interval)
+    scheduler.add_default_jobs(args.backup_dir)
+
+    if args.once:
+        for job in scheduler.jobs:
+            success, message = scheduler.run_job(job)
+            print(f"{job.name}: {'ok' if success else message}")
+        scheduler.flush_log()
+        return
+
+    scheduler.start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        scheduler.stop()
+
+
+if __name__ == "__main__":
+    main()
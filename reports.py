@@ -0,0 +1,97 @@
+import argparse
+import csv
+import html
+import os
+from datetime import date, datetime
+
+from db import Database
+
+
+def build_report(db, lecturer_id=None, start_day=None, end_day=None):
+    """Collect every report section as (key, title, headers, rows) from the rollup tables"""
+    this_year = date.today().year
+    ages = [(this_year - birth_year, students)
+            for birth_year, students in reversed(db.get_birth_year_counts(lecturer_id))]
+
+    return [
+        ("registrations_per_day", "Registrations per Day", ("Day", "Registrations"),
+         db.get_registrations_per_day(lecturer_id, start_day, end_day)),
+        ("registrations_per_course", "Students per Course", ("Course", "Students"),
+         db.get_registrations_per_course(lecturer_id)),
+        # Ages are by birth year, i.e. the age each student turns this year
+        ("age_distribution", "Age Distribution", ("Age", "Students"), ages),
+    ]
+
+
+def write_csv(report, directory):
+    """Write one CSV file per report section and return their paths"""
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for key, title, headers, rows in report:
+        path = os.path.join(directory, f"{key}.csv")
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(headers)
+            writer.writerows(rows)
+        paths.append(path)
+    return paths
+
+
+def render_html(report):
+    """Render the report as a standalone HTML page"""
+    generated = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    parts = [
+        "<!DOCTYPE html>",
+        "<html><head><meta charset=\"utf-8\"><title>Enrollment Report</title>",
+        "<style>body{font-family:Arial,sans-serif}table{border-collapse:collapse;margin-bottom:2em}"
+        "th,td{border:1px solid #ccc;padding:4px 12px;text-align:left}</style>",
+        "</head><body>",
+        "<h1>Enrollment Report</h1>",
+        f"<p>Generated {generated}</p>",
+    ]
+    for key, title, headers, rows in report:
+        parts.append(f"<h2 id=\"{key}\">{html.escape(title)}</h2>")
+        parts.append("<table><tr>" + "".join(f"<th>{html.escape(str(h))}</th>" for h in headers) + "</tr>")
+        for row in rows:
+            parts.append("<tr>" + "".join(f"<td>{html.escape(str(value))}</td>" for value in row) + "</tr>")
+        parts.append("</table>")
+    parts.append("</body></html>")
+    return "\n".join(parts)
+
+
+def write_html(report, path):
+    """Write the report as an HTML file"""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(render_html(report))
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate enrollment reports")
+    parser.add_argument("--db", default="university_data.db", help="Path to the database file")
+    parser.add_argument("--format", choices=["html", "csv"], default="html")
+    parser.add_argument("--output", default=None,
+                        help="Output file (html) or directory (csv); defaults to ./reports")
+    parser.add_argument("--lecturer-id", type=int, default=None,
+                        help="Only include the courses visible to this lecturer")
+    parser.add_argument("--start", default=None, help="First registration day (YYYY-MM-DD)")
+    parser.add_argument("--end", default=None, help="Last registration day (YYYY-MM-DD)")
+    args = parser.parse_args()
+
+    db = Database(args.db)
+    try:
+        report = build_report(db, args.lecturer_id, args.start, args.end)
+    finally:
+        db.close()
+
+    if args.format == "csv":
+        for path in write_csv(report, args.output or "reports"):
+            print(f"Wrote {path}")
+    else:
+        output = args.output or os.path.join("reports", "enrollment_report.html")
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        print(f"Wrote {write_html(report, output)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+import math
+import re
+from functools import lru_cache
+
+# Split on anything that is not a letter or digit
+WORD_SPLIT = re.compile(r"[\W_]+")
+
+# Minimum share of the query's trigrams a match must contain
+DEFAULT_THRESHOLD = 0.5
+
+
+def words(text):
+    """Return the lowercase words in text"""
+    return [word for word in WORD_SPLIT.split((text or "").lower()) if word]
+
+
+def trigrams(text):
+    """Return the set of padded, lowercase trigrams for every word in text"""
+    result = set()
+    for word in words(text):
+        # Pad like pg_trgm so word starts carry more weight than word ends
+        padded = f"  {word} "
+        for i in range(len(padded) - 2):
+            result.add(padded[i:i + 3])
+    return result
+
+
+def student_trigrams(username, name):
+    """Return the trigrams indexed for a student"""
+    return trigrams(name) | trigrams(username)
+
+
+def min_shared(query_trigrams, threshold=DEFAULT_THRESHOLD):
+    """Return how many of the query's trigrams a candidate must contain"""
+    return max(1, math.ceil(len(query_trigrams) * threshold))
+
+
+def query_variants(query):
+    """Return the query followed by each spelling with two adjacent letters of one word swapped
+
+    A swap like 'Jhon' breaks most of a short word's trigrams, so candidates
+    are also looked up under every single-transposition variant.
+    """
+    query_words = words(query)
+    variants = [" ".join(query_words)]
+    for i, word in enumerate(query_words):
+        for j in range(len(word) - 1):
+            if word[j] != word[j + 1]:
+                swapped = word[:j] + word[j + 1] + word[j] + word[j + 2:]
+                variants.append(" ".join(query_words[:i] + [swapped] + query_words[i + 1:]))
+    return variants
+
+
+@lru_cache(maxsize=65536)
+def edit_distance(a, b):
+    """Return the Damerau-Levenshtein (optimal string alignment) distance between two words
+
+    Insertions, deletions, substitutions and swaps of adjacent letters each cost 1.
+    """
+    previous, current = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        before, previous, current = previous, current, [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], before[j - 2] + 1)
+    return current[-1]
+
+
+def word_distance(query_word, text_word):
+    """Return (edit distance, length difference) from a query word to a word or its prefix"""
+    # Comparing with the prefix lets a partly typed name ('Smi') match in full
+    distance = min(edit_distance(query_word, text_word),
+                   edit_distance(query_word, text_word[:len(query_word)]))
+    return distance, abs(len(text_word) - len(query_word))
+
+
+def match_score(query_words, variant_trigrams, text):
+    """Rank text against a query, returning a sort key where lower is better
+
+    The key is (distance, length difference, -similarity). Each query word is
+    paired with its closest word in text; distance and length difference are
+    summed over those pairs, so 'Jonh' prefers 'John' over the equally distant
+    'Jon'. similarity, the best trigram Jaccard index against the query or one
+    of its variants, breaks any remaining ties.
+    """
+    text_words = words(text)
+    text_trigrams = trigrams(text)
+    if not query_words or not text_words:
+        return math.inf, math.inf, 0.0
+    distance = length_gap = 0
+    for query_word in query_words:
+        closest = min(word_distance(query_word, text_word) for text_word in text_words)
+        distance += closest[0]
+        length_gap += closest[1]
+    similarity = max(len(query_trigrams & text_trigrams) / len(query_trigrams | text_trigrams)
+                     for query_trigrams in variant_trigrams)
+    return distance, length_gap, -similarity
@@ -0,0 +1,152 @@
+import hashlib
+import hmac
+import secrets
+import threading
+import time
+
+# Default lifetimes (in seconds)
+IDLE_TIMEOUT = 30 * 60
+ABSOLUTE_TIMEOUT = 12 * 60 * 60
+# Sliding expiry is only written back to the database this often
+PERSIST_INTERVAL = 60
+
+
+def reap_expired_sessions(conn, batch_size=500, now=None):
+    """Delete expired sessions in small batches so the write lock is held briefly"""
+    now = time.time() if now is None else now
+    removed = 0
+    while True:
+        cursor = conn.execute('''
+        DELETE FROM sessions WHERE session_id IN (
+            SELECT session_id FROM sessions WHERE expires_at < ? LIMIT ?
+        )
+        ''', (now, batch_size))
+        conn.commit()
+        removed += cursor.rowcount
+        if cursor.rowcount < batch_size:
+            return removed
+
+
+class SessionStore:
+    def __init__(self, db, idle_timeout=IDLE_TIMEOUT, absolute_timeout=ABSOLUTE_TIMEOUT):
+        """Initialize the session store on top of a Database"""
+        self.db = db
+        self.idle_timeout = idle_timeout
+        self.absolute_timeout = absolute_timeout
+        self._secret = self._load_secret()
+        self._cache = {}  # session_id -> session dict
+        self._lock = threading.Lock()
+
+    def _load_secret(self):
+        """Load the token signing key, creating it on first use"""
+        self.db.cursor.execute("SELECT value FROM settings WHERE key = 'session_secret'")
+        result = self.db.cursor.fetchone()
+        if result:
+            return bytes.fromhex(result[0])
+        secret = secrets.token_bytes(32)
+        self.db.cursor.execute("INSERT INTO settings (key, value) VALUES ('session_secret', ?)",
+                               (secret.hex(),))
+        self.db.conn.commit()
+        return secret
+
+    def _sign(self, session_id):
+        """Return the signature for a session ID"""
+        return hmac.new(self._secret, session_id.encode('utf-8'), hashlib.sha256).hexdigest()
+
+    def _parse_token(self, token):
+        """Return the session ID from a token, or None if the signature is wrong"""
+        session_id, _, signature = (token or "").partition(".")
+        if not session_id or not hmac.compare_digest(signature, self._sign(session_id)):
+            return None
+        return session_id
+
+    def create(self, user_type, user_id):
+        """Start a session for an authenticated user and return its token"""
+        session_id = secrets.token_urlsafe(32)
+        now = time.time()
+        session = {
+            'session_id': session_id,
+            'user_type': user_type,
+            'user_id': user_id,
+            'created_at': now,
+            'expires_at': now + self.idle_timeout,
+            'persisted_at': now
+        }
+        self.db.cursor.execute('''
+        INSERT INTO sessions (session_id, user_type, user_id, created_at, expires_at)
+        VALUES (?, ?, ?, ?, ?)
+        ''', (session_id, user_type, user_id, now, session['expires_at']))
+        self.db.conn.commit()
+        with self._lock:
+            self._cache[session_id] = session
+        return f"{session_id}.{self._sign(session_id)}"
+
+    def validate(self, token, extend=True):
+        """Return {'user_type', 'user_id'} for a live session, or None"""
+        # A cached session costs an HMAC and a dict lookup; the database is only
+        # read on a cache miss and written at most every PERSIST_INTERVAL
+        session_id = self._parse_token(token)
+        if session_id is None:
+            return None
+
+        with self._lock:
+            session = self._cache.get(session_id)
+        if session is None:
+            session = self._load(session_id)
+            if session is None:
+                return None
+
+        now = time.time()
+        if now >= session['expires_at'] or now >= session['created_at'] + self.absolute_timeout:
+            self.revoke(token)
+            return None
+
+        if extend:
+            session['expires_at'] = min(now + self.idle_timeout,
+                                        session['created_at'] + self.absolute_timeout)
+            if now - session['persisted_at'] >= PERSIST_INTERVAL:
+                self.db.cursor.execute("UPDATE sessions SET expires_at = ? WHERE session_id = ?",
+                                       (session['expires_at'], session_id))
+                self.db.conn.commit()
+                session['persisted_at'] = now
+
+        return {'user_type': session['user_type'], 'user_id': session['user_id']}
+
+    def _load(self, session_id):
+        """Load a session from the database into the cache"""
+        self.db.cursor.execute('''
+        SELECT user_type, user_id, created_at, expires_at FROM sessions WHERE session_id = ?
+        ''', (session_id,))
+        result = self.db.cursor.fetchone()
+        if not result:
+            return None
+        session = {
+            'session_id': session_id,
+            'user_type': result[0],
+            'user_id': result[1],
+            'created_at': result[2],
+            'expires_at': result[3],
+            'persisted_at': time.time()
+        }
+        with self._lock:
+            self._cache[session_id] = session
+        return session
+
+    def revoke(self, token):
+        """End a session (e.g. on logout)"""
+        session_id = self._parse_token(token)
+        if session_id is None:
+            return
+        with self._lock:
+            self._cache.pop(session_id, None)
+        self.db.cursor.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+        self.db.conn.commit()
+
+    def reap(self, batch_size=500):
+        """Remove expired sessions from the cache and the database"""
+        now = time.time()
+        with self._lock:
+            for session_id in [session_id for session_id, session in self._cache.items()
+                               if now >= session['expires_at']]:
+                del self._cache[session_id]
+        return reap_expired_sessions(self.db.conn, batch_size, now)
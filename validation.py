@@ -0,0 +1,134 @@
+import re
+from datetime import date
+from functools import lru_cache
+
+# Compiled once at import time and shared by every form, import and API path
+USERNAME_PATTERN = re.compile(r"[A-Za-z0-9_.-]{3,30}")
+DATE_PATTERN = re.compile(r"\d{4}-\d{2}-\d{2}")
+PHONE_PATTERN = re.compile(r"\+[1-9]\d{6,14}")  # E.164
+PHONE_SEPARATORS = re.compile(r"[\s().-]+")
+
+MIN_PASSWORD_LENGTH = 6
+MIN_AGE = 16
+MAX_AGE = 100
+
+
+class Rule:
+    def __init__(self, field, label, required=True, pattern=None, pattern_message=None,
+                 min_length=0, max_length=255, check=None):
+        """Describe how a single field is validated"""
+        self.field = field
+        self.label = label
+        self.required = required
+        self.pattern = pattern
+        self.pattern_message = pattern_message
+        self.min_length = min_length
+        self.max_length = max_length
+        self.check = check  # Optional callable returning an error message or None
+
+    def validate(self, value):
+        """Return an error message for value, or None if it is valid"""
+        # Whitespace-only input counts as missing, whether or not the caller stripped it
+        if not value or not value.strip():
+            return f"{self.label} is required." if self.required else None
+        if len(value) < self.min_length:
+            return f"{self.label} must be at least {self.min_length} characters long."
+        if len(value) > self.max_length:
+            return f"{self.label} must be at most {self.max_length} characters long."
+        if self.pattern is not None and not self.pattern.fullmatch(value):
+            return self.pattern_message
+        if self.check is not None:
+            return self.check(value)
+        return None
+
+
+@lru_cache(maxsize=1)
+def _dob_bounds(today):
+    """Return the earliest and latest accepted birth dates as ISO strings"""
+    def years_ago(years):
+        try:
+            return today.replace(year=today.year - years)
+        except ValueError:  # 29 February
+            return today.replace(year=today.year - years, day=28)
+
+    return years_ago(MAX_AGE).isoformat(), years_ago(MIN_AGE).isoformat()
+
+
+def _check_dob(value):
+    """Check that a YYYY-MM-DD date exists and gives a plausible student age"""
+    try:
+        date.fromisoformat(value)
+    except ValueError:
+        return "Date of Birth is not a valid date."
+    # ISO dates compare correctly as strings
+    earliest, latest = _dob_bounds(date.today())
+    if not earliest <= value <= latest:
+        return f"Date of Birth must give an age between {MIN_AGE} and {MAX_AGE}."
+    return None
+
+
+def normalize_phone(value):
+    """Strip spaces and punctuation from a phone number, e.g. '+44 (7700) 900-123' -> '+447700900123'"""
+    return PHONE_SEPARATORS.sub("", value)
+
+
+def _check_phone(value):
+    """Check that a phone number is in E.164 format, ignoring spaces and punctuation"""
+    if not PHONE_PATTERN.fullmatch(normalize_phone(value)):
+        return "Emergency Contact Number must be in international format, e.g. +447700900123."
+    return None
+
+
+USERNAME_RULE = Rule("username", "Username", pattern=USERNAME_PATTERN,
+                     pattern_message="Username must be 3-30 characters: letters, digits, '.', '_' or '-'.")
+PASSWORD_RULE = Rule("password", "Password", min_length=MIN_PASSWORD_LENGTH, max_length=128)
+
+# Fields a student can edit after registering
+PROFILE_RULES = [
+    Rule("name", "Full Name"),
+    Rule("pronouns", "Pronouns", required=False, max_length=50),
+    Rule("dob", "Date of Birth", pattern=DATE_PATTERN,
+         pattern_message="Date of Birth must be in YYYY-MM-DD format.", check=_check_dob),
+    Rule("home_address", "Home Address"),
+    Rule("term_address", "Term Address", required=False),
+    Rule("emergency_name", "Emergency Contact Name"),
+    Rule("emergency_number", "Emergency Contact Number", check=_check_phone),
+    Rule("course", "Course"),
+]
+
+REGISTRATION_RULES = [USERNAME_RULE, PASSWORD_RULE] + PROFILE_RULES
+
+# Profile rules for an update that keeps the stored emergency number, which may
+# predate E.164 enforcement and stays accepted until the student changes it
+PROFILE_RULES_KEEP_PHONE = [
+    Rule(rule.field, rule.label) if rule.field == "emergency_number" else rule
+    for rule in PROFILE_RULES
+]
+
+
+def validate(record, rules):
+    """Validate a dict of field values, returning (True, None) or (False, first error)"""
+    for rule in rules:
+        message = rule.validate(record.get(rule.field))
+        if message:
+            return False, message
+    return True, None
+
+
+def validate_batch(records, rules):
+    """Validate many records in one call, returning a list of (index, error) pairs
+
+    Validation runs column by column so each rule's lookups are done once per
+    batch rather than once per row.
+    """
+    errors = {}
+    for rule in rules:
+        rule_validate = rule.validate
+        field = rule.field
+        for index, record in enumerate(records):
+            if index in errors:
+                continue
+            message = rule_validate(record.get(field))
+            if message:
+                errors[index] = message
+    return sorted(errors.items())